@@ -0,0 +1,187 @@
+##############################################################################
+## This file is part of 'surf-tutorial'.
+## It is subject to the license terms in the LICENSE.txt file found in the
+## top-level directory of this distribution and at:
+##    https://confluence.slac.stanford.edu/display/ppareg/LICENSE.html.
+## No part of 'surf-tutorial', including this file,
+## may be copied, modified, propagated, or distributed except according to
+## the terms contained in the LICENSE.txt file.
+##############################################################################
+
+# dut_tb
+import logging
+import os
+import sys
+import random
+import cocotb
+from cocotb.clock      import Clock
+from cocotb.triggers   import RisingEdge
+from cocotbext.axi     import AxiLiteBus, AxiLiteMaster, AxiResp
+from cocotb.regression import TestFactory
+
+# Shared surf-tutorial helpers (labs/python)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../python'))
+from surf_tutorial.budget import HandshakeMonitor, register_snapshot, with_budget
+from surf_tutorial.dut import is_model
+from surf_tutorial.harness import is_cocotb_module
+from surf_tutorial.session import SessionTB, restart_drivers
+
+# Define a new log level
+CUSTOM_LEVEL = 60
+logging.addLevelName(CUSTOM_LEVEL, "CUSTOM")
+
+def custom(self, message, *args, **kwargs):
+    if self.isEnabledFor(CUSTOM_LEVEL):
+        self._log(CUSTOM_LEVEL, message, args, **kwargs)
+
+# Add the custom level to the logging.Logger class
+logging.Logger.custom = custom
+
+# Helper function for converting 32-bit values to string
+def rdDataToStr(data):
+    return hex(int.from_bytes(data, byteorder="little"))
+
+class TB(SessionTB):
+    def __init__(self, dut):
+
+        # Pointer to DUT object
+        self.dut = dut
+
+        self.log = logging.getLogger("cocotb.tb")
+        self.log.setLevel(logging.DEBUG)
+
+        # Python model of the DUT (SIM_MODE=model), no simulator signals to drive
+        if is_model(dut):
+            self.axil = dut.axil_master
+            return
+
+        # Start clock (100 MHz) in a separate thread
+        cocotb.start_soon(Clock(dut.S_AXI_ACLK, 10.0, units='ns').start())
+
+        # The AXI-Lite Master of a previous test is restarted (see surf_tutorial/session.py),
+        # the DUT is only reset again if that test left transactions outstanding
+        if self.reused:
+            self.needs_reset |= not restart_drivers([self.axil], dut.S_AXI_ARESETN, False)
+        else:
+            # Create the AXI-Lite Master
+            self.axil = AxiLiteMaster(
+                bus   = AxiLiteBus.from_prefix(dut, 'S_AXI'),
+                clock = dut.S_AXI_ACLK,
+                reset = dut.S_AXI_ARESETN,
+                reset_active_level=False)
+
+        # Hang diagnostics, logged if the test runs out of its budget
+        self.handshakes = {}
+        for channel in ['AW', 'W', 'B', 'AR', 'R']:
+            self.handshakes[channel] = HandshakeMonitor(
+                clock = dut.S_AXI_ACLK,
+                valid = getattr(dut, f'S_AXI_{channel}VALID'),
+                ready = getattr(dut, f'S_AXI_{channel}READY'),
+            )
+        register_snapshot(self.snapshot)
+
+    def snapshot(self):
+        snapshot = {
+            'outstanding writes' : self.axil.write_if.in_flight_operations,
+            'outstanding reads'  : self.axil.read_if.in_flight_operations,
+        }
+        for channel, handshake in self.handshakes.items():
+            snapshot[f'S_AXI_{channel}'] = handshake
+        return snapshot
+
+    async def cycle_reset(self):
+        # Skipped when the previous test on a reused TB passed and left the DUT idle
+        if not self.needs_reset:
+            return
+        self.needs_reset = False
+
+        self.dut.S_AXI_ARESETN.setimmediatevalue(0)
+        await RisingEdge(self.dut.S_AXI_ACLK)
+        await RisingEdge(self.dut.S_AXI_ACLK)
+        self.dut.S_AXI_ARESETN.value = 0
+        await RisingEdge(self.dut.S_AXI_ACLK)
+        await RisingEdge(self.dut.S_AXI_ACLK)
+        self.dut.S_AXI_ARESETN.value = 1
+        await RisingEdge(self.dut.S_AXI_ACLK)
+        await RisingEdge(self.dut.S_AXI_ACLK)
+
+    async def add_delay(self,delay):
+        for i in range(delay):
+            await RisingEdge(self.dut.S_AXI_ACLK)
+
+async def dut_tb(dut):
+    # Initialize the DUT
+    tb = TB(dut)
+
+    # Reset DUT
+    await tb.cycle_reset()
+
+    # Get the FpgaVersion register
+    rdTxn = await tb.axil.read(address=0x000, length=4)
+    assert rdTxn.resp == AxiResp.OKAY
+    tb.log.custom( f'FpgaVersion={rdDataToStr(rdTxn.data)}' )
+
+    # Test the scratchpad write/read operations
+    rdTxn = await tb.axil.read(address=0x004, length=4)
+    tb.log.custom( f'scratchpad(init value)={rdDataToStr(rdTxn.data)}' )
+    testWord = int(random.getrandbits(32)).to_bytes(4, "little")
+    wrTxn = await tb.axil.write(address=0x004, data=testWord)
+    assert wrTxn.resp == AxiResp.OKAY
+    rdTxn = await tb.axil.read(address=0x004, length=4)
+    assert rdTxn.resp == AxiResp.OKAY
+    assert rdTxn.data == testWord
+    tb.log.custom( f'Passed the scratchpad testing' )
+
+    # Check the default r.cnt and r.enableCnt values
+    rdTxn = await tb.axil.read(address=0x008, length=4)
+    tb.log.custom( f'cnt(init value)={rdDataToStr(rdTxn.data)}' )
+    rdTxn = await tb.axil.read(address=0x011, length=1)
+    tb.log.custom( f'enableCnt(init value)={rdDataToStr(rdTxn.data)}' )
+
+    # Start the counter and wait 100 cycles
+    wrTxn = await tb.axil.write(address=0x00C, data=int(0x1).to_bytes(4, "little"))
+    assert wrTxn.resp == AxiResp.OKAY
+    await tb.add_delay(100)
+
+    # Measure r.cnt and r.enableCnt values
+    rdTxn = await tb.axil.read(address=0x008, length=4)
+    tb.log.custom( f'cnt(running)={rdDataToStr(rdTxn.data)}' )
+    rdTxn = await tb.axil.read(address=0x011, length=1)
+    tb.log.custom( f'enableCnt(running)={rdDataToStr(rdTxn.data)}' )
+
+    # Stop the counter and check final count value and that it actually stopped
+    wrTxn = await tb.axil.write(address=0x00C, data=int(0x2).to_bytes(4, "little"))
+    assert wrTxn.resp == AxiResp.OKAY
+    rdTxn = await tb.axil.read(address=0x008, length=4)
+    tb.log.custom( f'cnt(stopped)={rdDataToStr(rdTxn.data)}' )
+    rdTxn = await tb.axil.read(address=0x011, length=1)
+    tb.log.custom( f'enableCnt(stopped)={rdDataToStr(rdTxn.data)}' )
+
+    # Get the Git Hash
+    rdTxn = await tb.axil.read(address=0x100, length=20)
+    assert rdTxn.resp == AxiResp.OKAY
+    tb.log.custom( f'gitHash={rdDataToStr(rdTxn.data)}' )
+
+    # Get the BuildStamp string
+    rdTxn = await tb.axil.read(address=0x200, length=256)
+    assert rdTxn.resp == AxiResp.OKAY
+    buildString = repr(rdTxn.data.decode('utf-8').rstrip('\x00'))
+    tb.log.custom( f'buildString={buildString}' )
+
+# TestFactory permutations: (test function, {option name: option values})
+# with_budget() aborts a hung test once it uses up its sim-time or wall-time (seconds) budget
+factories = [
+    (with_budget(dut_tb, sim_time=50, sim_time_unit='us', wall_time=60), {}),
+]
+
+def generate_tests():
+    # TestFactory.generate_tests() adds the tests to the module it is called from
+    for test_function, options in factories:
+        factory = TestFactory(test_function)
+        for name, values in options.items():
+            factory.add_option(name, values)
+        factory.generate_tests()
+
+# Not when tb_AllLabsWrapper imports this module for its factories only
+if is_cocotb_module(__name__):
+    generate_tests()
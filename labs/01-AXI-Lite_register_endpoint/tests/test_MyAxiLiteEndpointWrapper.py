@@ -8,133 +8,19 @@
 ## the terms contained in the LICENSE.txt file.
 ##############################################################################
 
-# dut_tb
-import logging
-import random
-import cocotb
-from cocotb.clock      import Clock
-from cocotb.triggers   import RisingEdge
-from cocotbext.axi     import AxiLiteBus, AxiLiteMaster, AxiResp
-from cocotb.regression import TestFactory
-
 # test_MyAxiLiteEndpointWrapper
-from cocotb_test.simulator import run
 import pytest
 import glob
 import os
 import sys
 
-# Define a new log level
-CUSTOM_LEVEL = 60
-logging.addLevelName(CUSTOM_LEVEL, "CUSTOM")
-
-def custom(self, message, *args, **kwargs):
-    if self.isEnabledFor(CUSTOM_LEVEL):
-        self._log(CUSTOM_LEVEL, message, args, **kwargs)
-
-# Add the custom level to the logging.Logger class
-logging.Logger.custom = custom
-
-# Helper function for converting 32-bit values to string
-def rdDataToStr(data):
-    return hex(int.from_bytes(data, byteorder="little"))
-
-class TB:
-    def __init__(self, dut):
-
-        # Pointer to DUT object
-        self.dut = dut
-
-        self.log = logging.getLogger("cocotb.tb")
-        self.log.setLevel(logging.DEBUG)
-
-        # Start clock (100 MHz) in a separate thread
-        cocotb.start_soon(Clock(dut.S_AXI_ACLK, 10.0, units='ns').start())
-
-        # Create the AXI-Lite Master
-        self.axil = AxiLiteMaster(
-            bus   = AxiLiteBus.from_prefix(dut, 'S_AXI'),
-            clock = dut.S_AXI_ACLK,
-            reset = dut.S_AXI_ARESETN,
-            reset_active_level=False)
-
-    async def cycle_reset(self):
-        self.dut.S_AXI_ARESETN.setimmediatevalue(0)
-        await RisingEdge(self.dut.S_AXI_ACLK)
-        await RisingEdge(self.dut.S_AXI_ACLK)
-        self.dut.S_AXI_ARESETN.value = 0
-        await RisingEdge(self.dut.S_AXI_ACLK)
-        await RisingEdge(self.dut.S_AXI_ACLK)
-        self.dut.S_AXI_ARESETN.value = 1
-        await RisingEdge(self.dut.S_AXI_ACLK)
-        await RisingEdge(self.dut.S_AXI_ACLK)
-
-    async def add_delay(self,delay):
-        for i in range(delay):
-            await RisingEdge(self.dut.S_AXI_ACLK)
-
-async def dut_tb(dut):
-    # Initialize the DUT
-    tb = TB(dut)
-
-    # Reset DUT
-    await tb.cycle_reset()
-
-    # Get the FpgaVersion register
-    rdTxn = await tb.axil.read(address=0x000, length=4)
-    assert rdTxn.resp == AxiResp.OKAY
-    tb.log.custom( f'FpgaVersion={rdDataToStr(rdTxn.data)}' )
-
-    # Test the scratchpad write/read operations
-    rdTxn = await tb.axil.read(address=0x004, length=4)
-    tb.log.custom( f'scratchpad(init value)={rdDataToStr(rdTxn.data)}' )
-    testWord = int(random.getrandbits(32)).to_bytes(4, "little")
-    wrTxn = await tb.axil.write(address=0x004, data=testWord)
-    assert wrTxn.resp == AxiResp.OKAY
-    rdTxn = await tb.axil.read(address=0x004, length=4)
-    assert rdTxn.resp == AxiResp.OKAY
-    assert rdTxn.data == testWord
-    tb.log.custom( f'Passed the scratchpad testing' )
-
-    # Check the default r.cnt and r.enableCnt values
-    rdTxn = await tb.axil.read(address=0x008, length=4)
-    tb.log.custom( f'cnt(init value)={rdDataToStr(rdTxn.data)}' )
-    rdTxn = await tb.axil.read(address=0x011, length=1)
-    tb.log.custom( f'enableCnt(init value)={rdDataToStr(rdTxn.data)}' )
-
-    # Start the counter and wait 100 cycles
-    wrTxn = await tb.axil.write(address=0x00C, data=int(0x1).to_bytes(4, "little"))
-    assert wrTxn.resp == AxiResp.OKAY
-    await tb.add_delay(100)
-
-    # Measure r.cnt and r.enableCnt values
-    rdTxn = await tb.axil.read(address=0x008, length=4)
-    tb.log.custom( f'cnt(running)={rdDataToStr(rdTxn.data)}' )
-    rdTxn = await tb.axil.read(address=0x011, length=1)
-    tb.log.custom( f'enableCnt(running)={rdDataToStr(rdTxn.data)}' )
-
-    # Stop the counter and check final count value and that it actually stopped
-    wrTxn = await tb.axil.write(address=0x00C, data=int(0x2).to_bytes(4, "little"))
-    assert wrTxn.resp == AxiResp.OKAY
-    rdTxn = await tb.axil.read(address=0x008, length=4)
-    tb.log.custom( f'cnt(stopped)={rdDataToStr(rdTxn.data)}' )
-    rdTxn = await tb.axil.read(address=0x011, length=1)
-    tb.log.custom( f'enableCnt(stopped)={rdDataToStr(rdTxn.data)}' )
-
-    # Get the Git Hash
-    rdTxn = await tb.axil.read(address=0x100, length=20)
-    assert rdTxn.resp == AxiResp.OKAY
-    tb.log.custom( f'gitHash={rdDataToStr(rdTxn.data)}' )
-
-    # Get the BuildStamp string
-    rdTxn = await tb.axil.read(address=0x200, length=256)
-    assert rdTxn.resp == AxiResp.OKAY
-    buildString = repr(rdTxn.data.decode('utf-8').rstrip('\x00'))
-    tb.log.custom( f'buildString={buildString}' )
-
-if cocotb.SIM_NAME:
-    factory = TestFactory(dut_tb)
-    factory.generate_tests()
+# Shared surf-tutorial helpers (labs/python)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../python'))
+from surf_tutorial.models import MyAxiLiteEndpointModel
+from surf_tutorial.runner import run_regression
+
+# Simulator side cocotb testbench, only imported here for its TestFactory permutations
+from tb_MyAxiLiteEndpointWrapper import factories
 
 tests_dir = os.path.dirname(__file__)
 tests_module = 'MyAxiLiteEndpointWrapper'
@@ -147,13 +33,21 @@ def test_MyAxiLiteEndpointWrapper(parameters):
 
     # https://github.com/themperek/cocotb-test#arguments-for-simulatorrun
     # https://github.com/themperek/cocotb-test/blob/master/cocotb_test/simulator.py
-    run(
+    run_regression(
+        # TestFactory tests, split across SHARDS simulator processes
+        factories = factories,
+
+        # Python model of the DUT (SIM_MODE=model or crosscheck)
+        model = MyAxiLiteEndpointModel,
+
         # top level HDL
         toplevel = f'work.{tests_module}'.lower(),
 
-        # name of the file that contains @cocotb.test() -- this file
+        # name of the file that contains @cocotb.test() -- the tb_*.py testbench, kept
+        # separate from this pytest launcher so the simulator only imports the testbench,
+        # not the runner and model helpers of the launcher (cocotb itself still imports pytest)
         # https://docs.cocotb.org/en/stable/building.html?#envvar-MODULE
-        module = f'test_{tests_module}',
+        module = f'tb_{tests_module}',
 
         # https://docs.cocotb.org/en/stable/building.html?#var-TOPLEVEL_LANG
         toplevel_lang = 'vhdl',
@@ -0,0 +1,367 @@
+##############################################################################
+## This file is part of 'surf-tutorial'.
+## It is subject to the license terms in the LICENSE.txt file found in the
+## top-level directory of this distribution and at:
+##    https://confluence.slac.stanford.edu/display/ppareg/LICENSE.html.
+## No part of 'surf-tutorial', including this file,
+## may be copied, modified, propagated, or distributed except according to
+## the terms contained in the LICENSE.txt file.
+##############################################################################
+
+import cocotb
+from cocotb.clock import Clock
+from cocotb.queue import Queue
+from cocotb.triggers import RisingEdge, Timer
+from cocotb.regression import TestFactory
+from cocotb.utils import get_sim_time
+
+from cocotbext.axi import AxiLiteBus, AxiLiteMaster, AxiResp
+
+import collections
+import itertools
+import logging
+import random
+import os
+import sys
+
+# Shared surf-tutorial helpers (labs/python)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../python'))
+from surf_tutorial.budget import HandshakeMonitor, register_snapshot, with_budget
+from surf_tutorial.dut import is_model
+from surf_tutorial.harness import is_cocotb_module
+from surf_tutorial.session import SessionTB, restart_drivers
+from surf_tutorial.tier import tier_options, tier_sample
+
+# Define a new log level
+CUSTOM_LEVEL = 60
+logging.addLevelName(CUSTOM_LEVEL, "CUSTOM")
+
+def custom(self, message, *args, **kwargs):
+    if self.isEnabledFor(CUSTOM_LEVEL):
+        self._log(CUSTOM_LEVEL, message, args, **kwargs)
+
+# Add the custom level to the logging.Logger class
+logging.Logger.custom = custom
+
+# Helper function for converting 32-bit values to string
+def rdDataToStr(data):
+    return hex(int.from_bytes(data, byteorder="little"))
+
+class TB(SessionTB):
+    def __init__(self, dut):
+
+        # Pointer to DUT object
+        self.dut = dut
+
+        self.log = logging.getLogger("cocotb.tb")
+        self.log.setLevel(logging.DEBUG)
+
+        # Python model of the DUT (SIM_MODE=model), no simulator signals to drive
+        if is_model(dut):
+            self.axil_master = dut.axil_master
+            return
+
+        # Start clock (100 MHz) in a separate thread
+        cocotb.start_soon(Clock(dut.S_AXI_ACLK, 10.0, units='ns').start())
+
+        # The AXI-Lite Master of a previous test is restarted (see surf_tutorial/session.py),
+        # the DUT is only reset again if that test left transactions outstanding
+        if self.reused:
+            self.needs_reset |= not restart_drivers([self.axil_master], dut.S_AXI_ARESETN, False)
+        else:
+            # Create the AXI-Lite Master
+            self.axil_master = AxiLiteMaster(
+                bus   = AxiLiteBus.from_prefix(dut, 'S_AXI'),
+                clock = dut.S_AXI_ACLK,
+                reset = dut.S_AXI_ARESETN,
+                reset_active_level=False)
+
+        # Hang diagnostics, logged if the test runs out of its budget
+        self.handshakes = {}
+        for channel in ['AW', 'W', 'B', 'AR', 'R']:
+            self.handshakes[channel] = HandshakeMonitor(
+                clock = dut.S_AXI_ACLK,
+                valid = getattr(dut, f'S_AXI_{channel}VALID'),
+                ready = getattr(dut, f'S_AXI_{channel}READY'),
+            )
+        register_snapshot(self.snapshot)
+
+    def snapshot(self):
+        snapshot = {
+            'outstanding writes' : self.axil_master.write_if.in_flight_operations,
+            'outstanding reads'  : self.axil_master.read_if.in_flight_operations,
+        }
+        for channel, handshake in self.handshakes.items():
+            snapshot[f'S_AXI_{channel}'] = handshake
+        return snapshot
+
+    def set_idle_generator(self, generator=None):
+        if generator:
+            self.axil_master.write_if.aw_channel.set_pause_generator(generator())
+            self.axil_master.write_if.w_channel.set_pause_generator(generator())
+            self.axil_master.read_if.ar_channel.set_pause_generator(generator())
+
+    def set_backpressure_generator(self, generator=None):
+        if generator:
+            self.axil_master.write_if.b_channel.set_pause_generator(generator())
+            self.axil_master.read_if.r_channel.set_pause_generator(generator())
+
+    async def cycle_reset(self):
+        # Skipped when the previous test on a reused TB passed and left the DUT idle
+        if not self.needs_reset:
+            return
+        self.needs_reset = False
+
+        self.dut.S_AXI_ARESETN.setimmediatevalue(0)
+        await RisingEdge(self.dut.S_AXI_ACLK)
+        await RisingEdge(self.dut.S_AXI_ACLK)
+        self.dut.S_AXI_ARESETN.value = 0
+        await RisingEdge(self.dut.S_AXI_ACLK)
+        await RisingEdge(self.dut.S_AXI_ACLK)
+        self.dut.S_AXI_ARESETN.value = 1
+        await RisingEdge(self.dut.S_AXI_ACLK)
+        await RisingEdge(self.dut.S_AXI_ACLK)
+
+async def run_test_bytes(dut, data_in=None, idle_inserter=None, backpressure_inserter=None):
+
+    dut.log.custom( f'run_test_bytes(): idle_inserter={idle_inserter}, backpressure_inserter={backpressure_inserter}' )
+
+    tb = TB(dut)
+
+    byte_lanes = tb.axil_master.write_if.byte_lanes
+
+    await tb.cycle_reset()
+
+    tb.set_idle_generator(idle_inserter)
+    tb.set_backpressure_generator(backpressure_inserter)
+
+    # Every (length, region, offset) for the nightly and full tiers, a covering sample for quick
+    cases = list(itertools.product(range(1, byte_lanes*2), [0x0000_0000,0x0010_2000,0x0016_0000], range(byte_lanes)))
+    for length, memDev, offset in tier_sample(cases, quick=12):
+        addr = offset+memDev
+        tb.log.info( f'length={length},addr={hex(addr)}' )
+        test_data = bytearray([x % 256 for x in range(length)])
+        await tb.axil_master.write(addr, test_data)
+        data = await tb.axil_master.read(addr, length)
+        assert data.data == test_data
+
+    await RisingEdge(dut.S_AXI_ACLK)
+    await RisingEdge(dut.S_AXI_ACLK)
+    dut.log.custom( f'.... passed test' )
+
+async def run_test_words(dut):
+
+    dut.log.custom( f'run_test_words()' )
+
+    tb = TB(dut)
+
+    byte_lanes = tb.axil_master.write_if.byte_lanes
+
+    await tb.cycle_reset()
+
+    # Every (length, region, offset) for the nightly and full tiers, a covering sample for quick
+    cases = list(itertools.product(range(1, 4), [0x0000_0000,0x0010_2000,0x0016_0000], range(byte_lanes)))
+    for length, memDev, offset in tier_sample(cases, quick=8):
+        addr = offset
+        tb.log.info( f'length={length},addr={hex(addr)}' )
+
+        test_data = bytearray([x % 256 for x in range(length)])
+        event = tb.axil_master.init_write(addr, test_data)
+        await event.wait()
+        event = tb.axil_master.init_read(addr, length)
+        await event.wait()
+        assert event.data.data == test_data
+
+        test_data = bytearray([x % 256 for x in range(length)])
+        await tb.axil_master.write(addr, test_data)
+        assert (await tb.axil_master.read(addr, length)).data == test_data
+
+        test_data = [x * 0x1001 for x in range(length)]
+        await tb.axil_master.write_words(addr, test_data)
+        assert await tb.axil_master.read_words(addr, length) == test_data
+
+        test_data = [x * 0x10200201 for x in range(length)]
+        await tb.axil_master.write_dwords(addr, test_data)
+        assert await tb.axil_master.read_dwords(addr, length) == test_data
+
+        test_data = [x * 0x1020304004030201 for x in range(length)]
+        await tb.axil_master.write_qwords(addr, test_data)
+        assert await tb.axil_master.read_qwords(addr, length) == test_data
+
+        test_data = 0x01*length
+        await tb.axil_master.write_byte(addr, test_data)
+        assert await tb.axil_master.read_byte(addr) == test_data
+
+        test_data = 0x1001*length
+        await tb.axil_master.write_word(addr, test_data)
+        assert await tb.axil_master.read_word(addr) == test_data
+
+        test_data = 0x10200201*length
+        await tb.axil_master.write_dword(addr, test_data)
+        assert await tb.axil_master.read_dword(addr) == test_data
+
+        test_data = 0x1020304004030201*length
+        await tb.axil_master.write_qword(addr, test_data)
+        assert await tb.axil_master.read_qword(addr) == test_data
+
+    await RisingEdge(dut.S_AXI_ACLK)
+    await RisingEdge(dut.S_AXI_ACLK)
+    dut.log.custom( f'.... passed test' )
+
+async def run_stress_test(dut, idle_inserter=None, backpressure_inserter=None):
+
+    dut.log.custom( f'run_stress_test(): idle_inserter={idle_inserter}, backpressure_inserter={backpressure_inserter}' )
+
+    tb = TB(dut)
+
+    await tb.cycle_reset()
+
+    tb.set_idle_generator(idle_inserter)
+    tb.set_backpressure_generator(backpressure_inserter)
+
+    async def worker(master, offset, aperture, count=16):
+        for k in range(count):
+            length = random.randint(1, min(32, aperture))
+            addr = offset+random.randint(0, aperture-length)
+            test_data = bytearray([x % 256 for x in range(length)])
+
+            await Timer(random.randint(1, 100), 'ns')
+
+            await master.write(addr, test_data)
+
+            await Timer(random.randint(1, 100), 'ns')
+
+            data = await master.read(addr, length)
+            assert data.data == test_data
+
+    workers = []
+
+    for k in [0x0000_0000,0x0010_2000,0x0016_0000]:
+        workers.append(cocotb.start_soon(worker(tb.axil_master, k, 0x1000, count=16)))
+
+    while workers:
+        await workers.pop(0).join()
+
+    await RisingEdge(dut.S_AXI_ACLK)
+    await RisingEdge(dut.S_AXI_ACLK)
+    dut.log.custom( f'.... passed test' )
+
+async def run_test_pipelined(dut, depth=16, count=64, idle_inserter=None, backpressure_inserter=None):
+
+    dut.log.custom( f'run_test_pipelined(): depth={depth}, idle_inserter={idle_inserter}, backpressure_inserter={backpressure_inserter}' )
+
+    tb = TB(dut)
+
+    await tb.cycle_reset()
+
+    tb.set_idle_generator(idle_inserter)
+    tb.set_backpressure_generator(backpressure_inserter)
+
+    regions = [0x0000_0000,0x0010_2000,0x0016_0000]
+
+    # 'count' word writes per region, interleaved across the regions,
+    # each read back once its write completed
+    writes = collections.deque()
+    for k in range(count):
+        for region in regions:
+            writes.append((region, region+4*k, random.getrandbits(32).to_bytes(4, 'little')))
+    reads = collections.deque()
+
+    # Transactions complete in any order, whichever event is set first is checked first
+    completions = Queue()
+
+    async def complete(kind, region, addr, data, event):
+        await event.wait()
+        await completions.put((kind, region, addr, data, event.data))
+
+    transactions = {region: 0 for region in regions}
+    start = get_sim_time('ns')
+
+    outstanding = 0
+    while writes or reads or outstanding:
+
+        # Keep 'depth' transactions in flight, read backs first
+        while (writes or reads) and outstanding < depth:
+            if reads:
+                region, addr, data = reads.popleft()
+                event = tb.axil_master.init_read(addr, len(data))
+                cocotb.start_soon(complete('read', region, addr, data, event))
+            else:
+                region, addr, data = writes.popleft()
+                event = tb.axil_master.init_write(addr, data)
+                cocotb.start_soon(complete('write', region, addr, data, event))
+            outstanding += 1
+
+        kind, region, addr, data, resp = await completions.get()
+        outstanding -= 1
+        transactions[region] += 1
+
+        if kind == 'write':
+            assert resp.resp == AxiResp.OKAY
+            reads.append((region, addr, data))
+        else:
+            assert resp.resp == AxiResp.OKAY
+            assert resp.data == data, f'addr={hex(addr)}: read {resp.data.hex()}, expected {data.hex()}'
+
+    # Crossbar throughput, in simulated time. The regions are interleaved, so they share
+    # one measurement window: only the aggregate rate is meaningful, a per-region rate
+    # would just be a third of it
+    elapsed = get_sim_time('ns') - start
+    total = sum(transactions.values())
+    dut.log.custom( f'{total} transactions ({", ".join(f"{hex(region)}: {n}" for region, n in transactions.items())}) in {elapsed}ns, {total/(elapsed*1e-9):.3g} transactions/s' )
+
+    await RisingEdge(dut.S_AXI_ACLK)
+    await RisingEdge(dut.S_AXI_ACLK)
+    dut.log.custom( f'.... passed test' )
+
+def cycle_pause():
+    return itertools.cycle([1, 1, 1, 0])
+
+
+# TestFactory permutations: (test function, {option name: option values})
+# tier_options() samples the permutations for REGRESSION_TIER=quick
+# with_budget() aborts a hung test once it uses up its sim-time or wall-time (seconds) budget
+factories = [
+
+    #################
+    # run_test_bytes
+    #################
+    (with_budget(run_test_bytes, sim_time=500, sim_time_unit='us', wall_time=60), tier_options({
+        "idle_inserter"         : [None, cycle_pause],
+        "backpressure_inserter" : [None, cycle_pause],
+    })),
+
+    #################
+    # run_test_words
+    #################
+    (with_budget(run_test_words, sim_time=1, sim_time_unit='ms', wall_time=60), {}),
+
+    #################
+    # run_stress_test
+    #################
+    (with_budget(run_stress_test, sim_time=500, sim_time_unit='us', wall_time=60), tier_options({
+        "idle_inserter"         : [None, cycle_pause],
+        "backpressure_inserter" : [None, cycle_pause],
+    })),
+
+    #####################
+    # run_test_pipelined
+    #####################
+    (with_budget(run_test_pipelined, sim_time=500, sim_time_unit='us', wall_time=60), tier_options({
+        "depth"                 : [1, 4, 16],
+        "idle_inserter"         : [None, cycle_pause],
+        "backpressure_inserter" : [None, cycle_pause],
+    })),
+]
+
+def generate_tests():
+    # TestFactory.generate_tests() adds the tests to the module it is called from
+    for test_function, options in factories:
+        factory = TestFactory(test_function)
+        for name, values in options.items():
+            factory.add_option(name, values)
+        factory.generate_tests()
+
+# Not when tb_AllLabsWrapper imports this module for its factories only
+if is_cocotb_module(__name__):
+    generate_tests()
@@ -0,0 +1,302 @@
+##############################################################################
+## This file is part of 'SLAC Firmware Standard Library'.
+## It is subject to the license terms in the LICENSE.txt file found in the
+## top-level directory of this distribution and at:
+##    https://confluence.slac.stanford.edu/display/ppareg/LICENSE.html.
+## No part of 'SLAC Firmware Standard Library', including this file,
+## may be copied, modified, propagated, or distributed except according to
+## the terms contained in the LICENSE.txt file.
+##############################################################################
+
+# dut_tb
+import itertools
+import logging
+import os
+import sys
+import cocotb
+from cocotb.clock      import Clock
+from cocotb.triggers   import RisingEdge
+from cocotb.regression import TestFactory
+
+from cocotbext.axi import AxiStreamFrame, AxiStreamBus, AxiStreamSource, AxiStreamSink
+
+# Shared surf-tutorial helpers (labs/python)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../python'))
+from surf_tutorial.budget import HandshakeMonitor, register_snapshot, register_teardown, with_budget
+from surf_tutorial.dut import is_model
+from surf_tutorial.harness import is_cocotb_module
+from surf_tutorial.metrics import MetricsExporter, metrics_file, metrics_interval
+from surf_tutorial.session import SessionTB, restart_drivers
+from surf_tutorial.shard import shard_path
+from surf_tutorial.tier import tier_options, tier_sample
+
+# Define a new log level
+CUSTOM_LEVEL = 60
+logging.addLevelName(CUSTOM_LEVEL, "CUSTOM")
+
+def custom(self, message, *args, **kwargs):
+    if self.isEnabledFor(CUSTOM_LEVEL):
+        self._log(CUSTOM_LEVEL, message, args, **kwargs)
+
+# Add the custom level to the logging.Logger class
+logging.Logger.custom = custom
+
+# Helper function for converting 32-bit values to string
+def rdDataToStr(data):
+    return hex(int.from_bytes(data, byteorder="little"))
+
+class TB(SessionTB):
+    def __init__(self, dut):
+
+        # Pointer to DUT object
+        self.dut = dut
+
+        self.log = logging.getLogger("cocotb.tb")
+        self.log.setLevel(logging.DEBUG)
+
+        # Python model of the DUT (SIM_MODE=model), no simulator signals to drive
+        if is_model(dut):
+            self.source = dut.source
+            self.sink   = dut.sink
+            self.captures = []
+            if os.getenv('AXIS_CAPTURE'):
+                self.captures = [dut.capture(prefix, f'{prefix}.axis') for prefix in ['S_AXIS', 'M_AXIS']]
+                register_teardown(self.close_captures)
+            self.metrics = None
+            return
+
+        # Start AXIS_ACLK clock (200 MHz) in a separate thread
+        cocotb.start_soon(Clock(dut.AXIS_ACLK, 5.0, units='ns').start())
+
+        # The drivers of a previous test are restarted (see surf_tutorial/session.py),
+        # the DUT is only reset again if that test left frames in flight
+        if self.reused:
+            idle = restart_drivers([self.source, self.sink], dut.AXIS_ARESETN, False)
+            self.needs_reset |= not idle or self.handshakes['S_AXIS'].frames != self.handshakes['M_AXIS'].frames
+        else:
+            # Setup the AXI stream source
+            self.source = AxiStreamSource(
+                bus   = AxiStreamBus.from_prefix(dut, "S_AXIS"),
+                clock = dut.AXIS_ACLK,
+                reset = dut.AXIS_ARESETN,
+                reset_active_level = False,
+            )
+
+            # Setup the AXI stream sink
+            self.sink = AxiStreamSink(
+                bus   = AxiStreamBus.from_prefix(dut, "M_AXIS"),
+                clock = dut.AXIS_ACLK,
+                reset = dut.AXIS_ARESETN,
+                reset_active_level = False,
+            )
+
+        # Hang diagnostics, logged if the test runs out of its budget
+        self.handshakes = {}
+        for prefix in ['S_AXIS', 'M_AXIS']:
+            self.handshakes[prefix] = HandshakeMonitor(
+                clock = dut.AXIS_ACLK,
+                valid = getattr(dut, f'{prefix}_TVALID'),
+                ready = getattr(dut, f'{prefix}_TREADY'),
+                last  = getattr(dut, f'{prefix}_TLAST'),
+                keep  = getattr(dut, f'{prefix}_TKEEP'),
+            )
+        register_snapshot(self.snapshot)
+
+        # Optionally append live metrics to a JSON lines file (METRICS_FILE=<file.jsonl>)
+        self.metrics = None
+        if metrics_file():
+            self.metrics = MetricsExporter(
+                path      = metrics_file(),
+                period_ns = 5.0,
+                source    = self.source,
+                sink      = self.sink,
+                tx        = self.handshakes['S_AXIS'],
+                rx        = self.handshakes['M_AXIS'],
+                interval  = metrics_interval(),
+            )
+            # Also closed when the test fails or runs out of its budget
+            register_teardown(self.close_metrics)
+
+        # Optionally append the S_AXIS/M_AXIS traffic to capture files (AXIS_CAPTURE=1)
+        self.captures = []
+        if os.getenv('AXIS_CAPTURE'):
+            from surf_tutorial.capture import AxiStreamCapture
+            for prefix in ['S_AXIS', 'M_AXIS']:
+                self.captures.append(AxiStreamCapture(
+                    bus   = AxiStreamBus.from_prefix(dut, prefix),
+                    clock = dut.AXIS_ACLK,
+                    path  = shard_path(f'{prefix}.axis'),
+                    reset = dut.AXIS_ARESETN,
+                    reset_active_level = False,
+                ))
+            # Also closed when the test fails or runs out of its budget
+            register_teardown(self.close_captures)
+
+    def snapshot(self):
+        return {
+            'outstanding frames' : self.handshakes['S_AXIS'].frames - self.handshakes['M_AXIS'].frames,
+            'source queue'       : f'{self.source.queue_occupancy_frames} frames',
+            'sink queue'         : f'{self.sink.queue_occupancy_frames} frames',
+            'S_AXIS'             : self.handshakes['S_AXIS'],
+            'M_AXIS'             : self.handshakes['M_AXIS'],
+        }
+
+    def close_captures(self):
+        for capture in self.captures:
+            capture.close()
+
+    def close_metrics(self):
+        if self.metrics:
+            self.metrics.close()
+
+    def set_idle_generator(self, generator=None):
+        if generator:
+            self.source.set_pause_generator(generator())
+
+    def set_backpressure_generator(self, generator=None):
+        if generator:
+            self.sink.set_pause_generator(generator())
+
+    async def cycle_reset(self):
+        # Skipped when the previous test on a reused TB passed and left the DUT idle
+        if not self.needs_reset:
+            return
+        self.needs_reset = False
+
+        self.dut.AXIS_ARESETN.setimmediatevalue(0)
+        await RisingEdge(self.dut.AXIS_ACLK)
+        await RisingEdge(self.dut.AXIS_ACLK)
+        self.dut.AXIS_ARESETN.value = 0
+        await RisingEdge(self.dut.AXIS_ACLK)
+        await RisingEdge(self.dut.AXIS_ACLK)
+        self.dut.AXIS_ARESETN.value = 1
+        await RisingEdge(self.dut.AXIS_ACLK)
+        await RisingEdge(self.dut.AXIS_ACLK)
+
+async def run_test(dut, payload_lengths=None, payload_data=None, idle_inserter=None, backpressure_inserter=None):
+
+    dut.log.custom( f'run_test(): idle_inserter={idle_inserter}, backpressure_inserter={backpressure_inserter}' )
+
+    tb = TB(dut)
+
+    id_count = 2**len(tb.source.bus.tid)
+
+    cur_id = 1
+
+    await tb.cycle_reset()
+
+    tb.set_idle_generator(idle_inserter)
+    tb.set_backpressure_generator(backpressure_inserter)
+
+    test_frames = []
+
+    for test_data in [payload_data(x) for x in payload_lengths()]:
+        test_frame = AxiStreamFrame(test_data)
+        test_frame.tid = cur_id
+        test_frame.tdest = cur_id
+        await tb.source.send(test_frame)
+
+        test_frames.append(test_frame)
+
+        cur_id = (cur_id + 1) % id_count
+
+    for test_frame in test_frames:
+        rx_frame = await tb.sink.recv()
+
+        assert rx_frame.tdata == test_frame.tdata
+        assert rx_frame.tid == test_frame.tid
+        assert rx_frame.tdest == test_frame.tdest
+        assert not rx_frame.tuser
+
+    assert tb.sink.empty()
+    dut.log.custom( f'.... passed test' )
+
+async def run_test_replay(dut, idle_inserter=None, backpressure_inserter=None):
+
+    from surf_tutorial.capture import AxiStreamCaptureReader, AxiStreamCaptureWriter, replay_capture, compare_captures
+
+    replay_file = os.getenv('AXIS_REPLAY')
+    golden_file = os.getenv('AXIS_GOLDEN')
+
+    dut.log.custom( f'run_test_replay(): replay_file={replay_file}, golden_file={golden_file}, idle_inserter={idle_inserter}, backpressure_inserter={backpressure_inserter}' )
+
+    tb = TB(dut)
+
+    await tb.cycle_reset()
+
+    tb.set_idle_generator(idle_inserter)
+    tb.set_backpressure_generator(backpressure_inserter)
+
+    # Send the captured frames in the background, read lazily from the capture file
+    replay = cocotb.start_soon(replay_capture(tb.source, replay_file))
+
+    # Record the received frames for the golden capture comparison
+    rx_file = shard_path('M_AXIS_replay.axis')
+    if os.path.exists(rx_file):
+        os.remove(rx_file)
+
+    # The with statement also closes the files when a frame check fails
+    with AxiStreamCaptureWriter(rx_file) as rx_capture, AxiStreamCaptureReader(replay_file) as reader:
+        for test_frame in reader:
+            rx_frame = await tb.sink.recv()
+            rx_capture.write(rx_frame)
+
+            assert rx_frame.tdata == test_frame.tdata
+            assert rx_frame.tid == test_frame.tid
+            assert rx_frame.tdest == test_frame.tdest
+
+    frames = await replay
+
+    assert tb.sink.empty()
+    dut.log.custom( f'.... replayed {frames} frames' )
+
+    if golden_file:
+        mismatches = compare_captures(rx_file, golden_file)
+        for index, error in mismatches:
+            tb.log.error( f'frame {index}: {error}' )
+        assert not mismatches
+
+    dut.log.custom( f'.... passed test' )
+
+def cycle_pause():
+    return itertools.cycle([1, 1, 1, 0])
+
+def size_list():
+    # Every size for the nightly and full tiers, the 32-bit word boundaries plus a seeded sample for quick
+    return tier_sample(list(range(1, 32+1)), quick=8, keep=[1, 3, 4, 5, 31, 32])
+
+def incrementing_payload(length):
+    return bytearray(itertools.islice(itertools.cycle(range(256)), length))
+
+# TestFactory permutations: (test function, {option name: option values})
+# tier_options() samples the permutations for REGRESSION_TIER=quick
+# with_budget() aborts a hung test once it uses up its sim-time or wall-time (seconds) budget
+factories = [
+    (with_budget(run_test, sim_time=100, sim_time_unit='us', wall_time=60), tier_options({
+        "payload_lengths"       : [size_list],
+        "payload_data"          : [incrementing_payload],
+        "idle_inserter"         : [None, cycle_pause],
+        "backpressure_inserter" : [None, cycle_pause],
+    })),
+]
+
+# Replay a captured traffic file (AXIS_REPLAY=<file.axis>, optional AXIS_GOLDEN=<file.axis>)
+# No sim-time or wall-time limit since the replay time depends on the capture size,
+# with_budget() still runs the teardowns (metrics, captures) of the test
+if os.getenv('AXIS_REPLAY'):
+    factories.append((with_budget(run_test_replay), tier_options({
+        "idle_inserter"         : [None, cycle_pause],
+        "backpressure_inserter" : [None, cycle_pause],
+    })))
+
+def generate_tests():
+    # TestFactory.generate_tests() adds the tests to the module it is called from
+    for test_function, options in factories:
+        factory = TestFactory(test_function)
+        for name, values in options.items():
+            factory.add_option(name, values)
+        factory.generate_tests()
+
+# Not when tb_AllLabsWrapper imports this module for its factories only
+if is_cocotb_module(__name__):
+    generate_tests()
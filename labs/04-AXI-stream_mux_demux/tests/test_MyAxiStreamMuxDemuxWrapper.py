@@ -8,138 +8,19 @@
 ## the terms contained in the LICENSE.txt file.
 ##############################################################################
 
-# dut_tb
-import itertools
-import logging
-import cocotb
-from cocotb.clock      import Clock
-from cocotb.triggers   import RisingEdge
-from cocotb.regression import TestFactory
-
-from cocotbext.axi import AxiStreamFrame, AxiStreamBus, AxiStreamSource, AxiStreamSink
-
 # test_MyAxiStreamMuxDemuxWrapper
-from cocotb_test.simulator import run
 import pytest
 import glob
 import os
+import sys
 
-# Define a new log level
-CUSTOM_LEVEL = 60
-logging.addLevelName(CUSTOM_LEVEL, "CUSTOM")
-
-def custom(self, message, *args, **kwargs):
-    if self.isEnabledFor(CUSTOM_LEVEL):
-        self._log(CUSTOM_LEVEL, message, args, **kwargs)
-
-# Add the custom level to the logging.Logger class
-logging.Logger.custom = custom
-
-# Helper function for converting 32-bit values to string
-def rdDataToStr(data):
-    return hex(int.from_bytes(data, byteorder="little"))
-
-class TB:
-    def __init__(self, dut):
-
-        # Pointer to DUT object
-        self.dut = dut
-
-        self.log = logging.getLogger("cocotb.tb")
-        self.log.setLevel(logging.DEBUG)
-
-        # Start AXIS_ACLK clock (200 MHz) in a separate thread
-        cocotb.start_soon(Clock(dut.AXIS_ACLK, 5.0, units='ns').start())
-
-        # Setup the AXI stream source
-        self.source = AxiStreamSource(
-            bus   = AxiStreamBus.from_prefix(dut, "S_AXIS"),
-            clock = dut.AXIS_ACLK,
-            reset = dut.AXIS_ARESETN,
-            reset_active_level = False,
-        )
-
-        # Setup the AXI stream sink
-        self.sink = AxiStreamSink(
-            bus   = AxiStreamBus.from_prefix(dut, "M_AXIS"),
-            clock = dut.AXIS_ACLK,
-            reset = dut.AXIS_ARESETN,
-            reset_active_level = False,
-        )
-
-    def set_idle_generator(self, generator=None):
-        if generator:
-            self.source.set_pause_generator(generator())
-
-    def set_backpressure_generator(self, generator=None):
-        if generator:
-            self.sink.set_pause_generator(generator())
-
-    async def cycle_reset(self):
-        self.dut.AXIS_ARESETN.setimmediatevalue(0)
-        await RisingEdge(self.dut.AXIS_ACLK)
-        await RisingEdge(self.dut.AXIS_ACLK)
-        self.dut.AXIS_ARESETN.value = 0
-        await RisingEdge(self.dut.AXIS_ACLK)
-        await RisingEdge(self.dut.AXIS_ACLK)
-        self.dut.AXIS_ARESETN.value = 1
-        await RisingEdge(self.dut.AXIS_ACLK)
-        await RisingEdge(self.dut.AXIS_ACLK)
-
-async def run_test(dut, payload_lengths=None, payload_data=None, idle_inserter=None, backpressure_inserter=None):
-
-    dut.log.custom( f'run_test(): idle_inserter={idle_inserter}, backpressure_inserter={backpressure_inserter}' )
-
-    tb = TB(dut)
+# Shared surf-tutorial helpers (labs/python)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../python'))
+from surf_tutorial.models import MyAxiStreamMuxDemuxModel
+from surf_tutorial.runner import run_regression
 
-    id_count = 2**len(tb.source.bus.tid)
-
-    cur_id = 1
-
-    await tb.cycle_reset()
-
-    tb.set_idle_generator(idle_inserter)
-    tb.set_backpressure_generator(backpressure_inserter)
-
-    test_frames = []
-
-    for test_data in [payload_data(x) for x in payload_lengths()]:
-        test_frame = AxiStreamFrame(test_data)
-        test_frame.tid = cur_id
-        test_frame.tdest = cur_id
-        await tb.source.send(test_frame)
-
-        test_frames.append(test_frame)
-
-        cur_id = (cur_id + 1) % id_count
-
-    for test_frame in test_frames:
-        rx_frame = await tb.sink.recv()
-
-        assert rx_frame.tdata == test_frame.tdata
-        assert rx_frame.tid == test_frame.tid
-        assert rx_frame.tdest == test_frame.tdest
-        assert not rx_frame.tuser
-
-    assert tb.sink.empty()
-    dut.log.custom( f'.... passed test' )
-
-def cycle_pause():
-    return itertools.cycle([1, 1, 1, 0])
-
-def size_list():
-    return list(range(1, 32+1))
-
-def incrementing_payload(length):
-    return bytearray(itertools.islice(itertools.cycle(range(256)), length))
-
-if cocotb.SIM_NAME:
-    factory = TestFactory(run_test)
-    factory.add_option("payload_lengths", [size_list])
-    factory.add_option("payload_data", [incrementing_payload])
-    factory.add_option("idle_inserter", [None, cycle_pause])
-    factory.add_option("backpressure_inserter", [None, cycle_pause])
-    factory.generate_tests()
+# Simulator side cocotb testbench, only imported here for its TestFactory permutations
+from tb_MyAxiStreamMuxDemuxWrapper import factories
 
 tests_dir = os.path.dirname(__file__)
 tests_module = 'MyAxiStreamMuxDemuxWrapper'
@@ -154,13 +35,24 @@ def test_MyAxiStreamMuxDemuxWrapper(parameters):
 
     # https://github.com/themperek/cocotb-test#arguments-for-simulatorrun
     # https://github.com/themperek/cocotb-test/blob/master/cocotb_test/simulator.py
-    run(
+    run_regression(
+        # TestFactory tests, split across SHARDS simulator processes
+        factories = factories,
+
+        # Python model of the DUT (SIM_MODE=model or crosscheck)
+        model = MyAxiStreamMuxDemuxModel,
+
+        # Capture files compared between the model and the RTL (SIM_MODE=crosscheck)
+        captures = ['S_AXIS.axis', 'M_AXIS.axis'],
+
         # top level HDL
         toplevel = f'work.{tests_module}'.lower(),
 
-        # name of the file that contains @cocotb.test() -- this file
+        # name of the file that contains @cocotb.test() -- the tb_*.py testbench, kept
+        # separate from this pytest launcher so the simulator only imports the testbench,
+        # not the runner and model helpers of the launcher (cocotb itself still imports pytest)
         # https://docs.cocotb.org/en/stable/building.html?#envvar-MODULE
-        module = f'test_{tests_module}',
+        module = f'tb_{tests_module}',
 
         # https://docs.cocotb.org/en/stable/building.html?#var-TOPLEVEL_LANG
         toplevel_lang = 'vhdl',
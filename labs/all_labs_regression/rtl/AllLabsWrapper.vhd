@@ -0,0 +1,237 @@
+-------------------------------------------------------------------------------
+-- Company    : SLAC National Accelerator Laboratory
+-------------------------------------------------------------------------------
+-- Description: Combined simulation top level with the wrappers of all the labs
+--              side by side, each with its own clock and reset. The ports of
+--              each wrapper are prefixed with its lab number (e.g. LAB01_S_AXI_ACLK)
+-------------------------------------------------------------------------------
+-- This file is part of 'surf-tutorial'.
+-- It is subject to the license terms in the LICENSE.txt file found in the
+-- top-level directory of this distribution and at:
+--    https://confluence.slac.stanford.edu/display/ppareg/LICENSE.html.
+-- No part of 'surf-tutorial', including this file,
+-- may be copied, modified, propagated, or distributed except according to
+-- the terms contained in the LICENSE.txt file.
+-------------------------------------------------------------------------------
+
+library ieee;
+use ieee.std_logic_1164.all;
+
+entity AllLabsWrapper is
+   generic (
+      -- MyAxiLiteEndpointWrapper generics
+      LAB01_EN_ERROR_RESP   : boolean                := false;
+      -- MyAxiStreamModuleWrapper generics
+      LAB02_TUSER_WIDTH     : natural range 1 to 8   := 2;
+      LAB02_TID_WIDTH       : natural range 1 to 8   := 1;
+      LAB02_TDEST_WIDTH     : natural range 1 to 8   := 1;
+      LAB02_TDATA_NUM_BYTES : natural range 1 to 128 := 4;
+      -- MyAxiLiteCrossbarWrapper generics
+      LAB03_EN_ERROR_RESP   : boolean                := false;
+      -- MyAxiStreamMuxDemuxWrapper generics
+      LAB04_TUSER_WIDTH     : natural range 1 to 8   := 2;
+      LAB04_TID_WIDTH       : natural range 1 to 8   := 1;
+      LAB04_TDEST_WIDTH     : natural range 1 to 8   := 1;
+      LAB04_TDATA_NUM_BYTES : natural range 1 to 128 := 4);
+   port (
+      -- MyAxiLiteEndpointWrapper (01-*)
+      LAB01_S_AXI_ACLK    : in  std_logic;
+      LAB01_S_AXI_ARESETN : in  std_logic;
+      LAB01_S_AXI_AWADDR  : in  std_logic_vector(11 downto 0);
+      LAB01_S_AXI_AWPROT  : in  std_logic_vector(2 downto 0);
+      LAB01_S_AXI_AWVALID : in  std_logic;
+      LAB01_S_AXI_AWREADY : out std_logic;
+      LAB01_S_AXI_WDATA   : in  std_logic_vector(31 downto 0);
+      LAB01_S_AXI_WSTRB   : in  std_logic_vector(3 downto 0);
+      LAB01_S_AXI_WVALID  : in  std_logic;
+      LAB01_S_AXI_WREADY  : out std_logic;
+      LAB01_S_AXI_BRESP   : out std_logic_vector(1 downto 0);
+      LAB01_S_AXI_BVALID  : out std_logic;
+      LAB01_S_AXI_BREADY  : in  std_logic;
+      LAB01_S_AXI_ARADDR  : in  std_logic_vector(11 downto 0);
+      LAB01_S_AXI_ARPROT  : in  std_logic_vector(2 downto 0);
+      LAB01_S_AXI_ARVALID : in  std_logic;
+      LAB01_S_AXI_ARREADY : out std_logic;
+      LAB01_S_AXI_RDATA   : out std_logic_vector(31 downto 0);
+      LAB01_S_AXI_RRESP   : out std_logic_vector(1 downto 0);
+      LAB01_S_AXI_RVALID  : out std_logic;
+      LAB01_S_AXI_RREADY  : in  std_logic;
+      -- MyAxiStreamModuleWrapper (02-*)
+      LAB02_AXIS_ACLK     : in  std_logic;
+      LAB02_AXIS_ARESETN  : in  std_logic;
+      LAB02_S_AXIS_TVALID : in  std_logic;
+      LAB02_S_AXIS_TDATA  : in  std_logic_vector((8*LAB02_TDATA_NUM_BYTES)-1 downto 0);
+      LAB02_S_AXIS_TSTRB  : in  std_logic_vector(LAB02_TDATA_NUM_BYTES-1 downto 0);
+      LAB02_S_AXIS_TKEEP  : in  std_logic_vector(LAB02_TDATA_NUM_BYTES-1 downto 0);
+      LAB02_S_AXIS_TLAST  : in  std_logic;
+      LAB02_S_AXIS_TDEST  : in  std_logic_vector(LAB02_TDEST_WIDTH-1 downto 0);
+      LAB02_S_AXIS_TID    : in  std_logic_vector(LAB02_TID_WIDTH-1 downto 0);
+      LAB02_S_AXIS_TUSER  : in  std_logic_vector(LAB02_TUSER_WIDTH-1 downto 0);
+      LAB02_S_AXIS_TREADY : out std_logic;
+      LAB02_M_AXIS_TVALID : out std_logic;
+      LAB02_M_AXIS_TDATA  : out std_logic_vector((8*LAB02_TDATA_NUM_BYTES)-1 downto 0);
+      LAB02_M_AXIS_TSTRB  : out std_logic_vector(LAB02_TDATA_NUM_BYTES-1 downto 0);
+      LAB02_M_AXIS_TKEEP  : out std_logic_vector(LAB02_TDATA_NUM_BYTES-1 downto 0);
+      LAB02_M_AXIS_TLAST  : out std_logic;
+      LAB02_M_AXIS_TDEST  : out std_logic_vector(LAB02_TDEST_WIDTH-1 downto 0);
+      LAB02_M_AXIS_TID    : out std_logic_vector(LAB02_TID_WIDTH-1 downto 0);
+      LAB02_M_AXIS_TUSER  : out std_logic_vector(LAB02_TUSER_WIDTH-1 downto 0);
+      LAB02_M_AXIS_TREADY : in  std_logic;
+      -- MyAxiLiteCrossbarWrapper (03-*)
+      LAB03_S_AXI_ACLK    : in  std_logic;
+      LAB03_S_AXI_ARESETN : in  std_logic;
+      LAB03_S_AXI_AWADDR  : in  std_logic_vector(31 downto 0);
+      LAB03_S_AXI_AWPROT  : in  std_logic_vector(2 downto 0);
+      LAB03_S_AXI_AWVALID : in  std_logic;
+      LAB03_S_AXI_AWREADY : out std_logic;
+      LAB03_S_AXI_WDATA   : in  std_logic_vector(31 downto 0);
+      LAB03_S_AXI_WSTRB   : in  std_logic_vector(3 downto 0);
+      LAB03_S_AXI_WVALID  : in  std_logic;
+      LAB03_S_AXI_WREADY  : out std_logic;
+      LAB03_S_AXI_BRESP   : out std_logic_vector(1 downto 0);
+      LAB03_S_AXI_BVALID  : out std_logic;
+      LAB03_S_AXI_BREADY  : in  std_logic;
+      LAB03_S_AXI_ARADDR  : in  std_logic_vector(31 downto 0);
+      LAB03_S_AXI_ARPROT  : in  std_logic_vector(2 downto 0);
+      LAB03_S_AXI_ARVALID : in  std_logic;
+      LAB03_S_AXI_ARREADY : out std_logic;
+      LAB03_S_AXI_RDATA   : out std_logic_vector(31 downto 0);
+      LAB03_S_AXI_RRESP   : out std_logic_vector(1 downto 0);
+      LAB03_S_AXI_RVALID  : out std_logic;
+      LAB03_S_AXI_RREADY  : in  std_logic;
+      -- MyAxiStreamMuxDemuxWrapper (04-*)
+      LAB04_AXIS_ACLK     : in  std_logic;
+      LAB04_AXIS_ARESETN  : in  std_logic;
+      LAB04_S_AXIS_TVALID : in  std_logic;
+      LAB04_S_AXIS_TDATA  : in  std_logic_vector((8*LAB04_TDATA_NUM_BYTES)-1 downto 0);
+      LAB04_S_AXIS_TSTRB  : in  std_logic_vector(LAB04_TDATA_NUM_BYTES-1 downto 0);
+      LAB04_S_AXIS_TKEEP  : in  std_logic_vector(LAB04_TDATA_NUM_BYTES-1 downto 0);
+      LAB04_S_AXIS_TLAST  : in  std_logic;
+      LAB04_S_AXIS_TDEST  : in  std_logic_vector(LAB04_TDEST_WIDTH-1 downto 0);
+      LAB04_S_AXIS_TID    : in  std_logic_vector(LAB04_TID_WIDTH-1 downto 0);
+      LAB04_S_AXIS_TUSER  : in  std_logic_vector(LAB04_TUSER_WIDTH-1 downto 0);
+      LAB04_S_AXIS_TREADY : out std_logic;
+      LAB04_M_AXIS_TVALID : out std_logic;
+      LAB04_M_AXIS_TDATA  : out std_logic_vector((8*LAB04_TDATA_NUM_BYTES)-1 downto 0);
+      LAB04_M_AXIS_TSTRB  : out std_logic_vector(LAB04_TDATA_NUM_BYTES-1 downto 0);
+      LAB04_M_AXIS_TKEEP  : out std_logic_vector(LAB04_TDATA_NUM_BYTES-1 downto 0);
+      LAB04_M_AXIS_TLAST  : out std_logic;
+      LAB04_M_AXIS_TDEST  : out std_logic_vector(LAB04_TDEST_WIDTH-1 downto 0);
+      LAB04_M_AXIS_TID    : out std_logic_vector(LAB04_TID_WIDTH-1 downto 0);
+      LAB04_M_AXIS_TUSER  : out std_logic_vector(LAB04_TUSER_WIDTH-1 downto 0);
+      LAB04_M_AXIS_TREADY : in  std_logic);
+end AllLabsWrapper;
+
+architecture mapping of AllLabsWrapper is
+
+begin
+
+   U_LAB01 : entity work.MyAxiLiteEndpointWrapper
+      generic map (
+         EN_ERROR_RESP => LAB01_EN_ERROR_RESP)
+      port map (
+         S_AXI_ACLK    => LAB01_S_AXI_ACLK,
+         S_AXI_ARESETN => LAB01_S_AXI_ARESETN,
+         S_AXI_AWADDR  => LAB01_S_AXI_AWADDR,
+         S_AXI_AWPROT  => LAB01_S_AXI_AWPROT,
+         S_AXI_AWVALID => LAB01_S_AXI_AWVALID,
+         S_AXI_AWREADY => LAB01_S_AXI_AWREADY,
+         S_AXI_WDATA   => LAB01_S_AXI_WDATA,
+         S_AXI_WSTRB   => LAB01_S_AXI_WSTRB,
+         S_AXI_WVALID  => LAB01_S_AXI_WVALID,
+         S_AXI_WREADY  => LAB01_S_AXI_WREADY,
+         S_AXI_BRESP   => LAB01_S_AXI_BRESP,
+         S_AXI_BVALID  => LAB01_S_AXI_BVALID,
+         S_AXI_BREADY  => LAB01_S_AXI_BREADY,
+         S_AXI_ARADDR  => LAB01_S_AXI_ARADDR,
+         S_AXI_ARPROT  => LAB01_S_AXI_ARPROT,
+         S_AXI_ARVALID => LAB01_S_AXI_ARVALID,
+         S_AXI_ARREADY => LAB01_S_AXI_ARREADY,
+         S_AXI_RDATA   => LAB01_S_AXI_RDATA,
+         S_AXI_RRESP   => LAB01_S_AXI_RRESP,
+         S_AXI_RVALID  => LAB01_S_AXI_RVALID,
+         S_AXI_RREADY  => LAB01_S_AXI_RREADY);
+
+   U_LAB02 : entity work.MyAxiStreamModuleWrapper
+      generic map (
+         TUSER_WIDTH     => LAB02_TUSER_WIDTH,
+         TID_WIDTH       => LAB02_TID_WIDTH,
+         TDEST_WIDTH     => LAB02_TDEST_WIDTH,
+         TDATA_NUM_BYTES => LAB02_TDATA_NUM_BYTES)
+      port map (
+         AXIS_ACLK     => LAB02_AXIS_ACLK,
+         AXIS_ARESETN  => LAB02_AXIS_ARESETN,
+         S_AXIS_TVALID => LAB02_S_AXIS_TVALID,
+         S_AXIS_TDATA  => LAB02_S_AXIS_TDATA,
+         S_AXIS_TSTRB  => LAB02_S_AXIS_TSTRB,
+         S_AXIS_TKEEP  => LAB02_S_AXIS_TKEEP,
+         S_AXIS_TLAST  => LAB02_S_AXIS_TLAST,
+         S_AXIS_TDEST  => LAB02_S_AXIS_TDEST,
+         S_AXIS_TID    => LAB02_S_AXIS_TID,
+         S_AXIS_TUSER  => LAB02_S_AXIS_TUSER,
+         S_AXIS_TREADY => LAB02_S_AXIS_TREADY,
+         M_AXIS_TVALID => LAB02_M_AXIS_TVALID,
+         M_AXIS_TDATA  => LAB02_M_AXIS_TDATA,
+         M_AXIS_TSTRB  => LAB02_M_AXIS_TSTRB,
+         M_AXIS_TKEEP  => LAB02_M_AXIS_TKEEP,
+         M_AXIS_TLAST  => LAB02_M_AXIS_TLAST,
+         M_AXIS_TDEST  => LAB02_M_AXIS_TDEST,
+         M_AXIS_TID    => LAB02_M_AXIS_TID,
+         M_AXIS_TUSER  => LAB02_M_AXIS_TUSER,
+         M_AXIS_TREADY => LAB02_M_AXIS_TREADY);
+
+   U_LAB03 : entity work.MyAxiLiteCrossbarWrapper
+      generic map (
+         EN_ERROR_RESP => LAB03_EN_ERROR_RESP)
+      port map (
+         S_AXI_ACLK    => LAB03_S_AXI_ACLK,
+         S_AXI_ARESETN => LAB03_S_AXI_ARESETN,
+         S_AXI_AWADDR  => LAB03_S_AXI_AWADDR,
+         S_AXI_AWPROT  => LAB03_S_AXI_AWPROT,
+         S_AXI_AWVALID => LAB03_S_AXI_AWVALID,
+         S_AXI_AWREADY => LAB03_S_AXI_AWREADY,
+         S_AXI_WDATA   => LAB03_S_AXI_WDATA,
+         S_AXI_WSTRB   => LAB03_S_AXI_WSTRB,
+         S_AXI_WVALID  => LAB03_S_AXI_WVALID,
+         S_AXI_WREADY  => LAB03_S_AXI_WREADY,
+         S_AXI_BRESP   => LAB03_S_AXI_BRESP,
+         S_AXI_BVALID  => LAB03_S_AXI_BVALID,
+         S_AXI_BREADY  => LAB03_S_AXI_BREADY,
+         S_AXI_ARADDR  => LAB03_S_AXI_ARADDR,
+         S_AXI_ARPROT  => LAB03_S_AXI_ARPROT,
+         S_AXI_ARVALID => LAB03_S_AXI_ARVALID,
+         S_AXI_ARREADY => LAB03_S_AXI_ARREADY,
+         S_AXI_RDATA   => LAB03_S_AXI_RDATA,
+         S_AXI_RRESP   => LAB03_S_AXI_RRESP,
+         S_AXI_RVALID  => LAB03_S_AXI_RVALID,
+         S_AXI_RREADY  => LAB03_S_AXI_RREADY);
+
+   U_LAB04 : entity work.MyAxiStreamMuxDemuxWrapper
+      generic map (
+         TUSER_WIDTH     => LAB04_TUSER_WIDTH,
+         TID_WIDTH       => LAB04_TID_WIDTH,
+         TDEST_WIDTH     => LAB04_TDEST_WIDTH,
+         TDATA_NUM_BYTES => LAB04_TDATA_NUM_BYTES)
+      port map (
+         AXIS_ACLK     => LAB04_AXIS_ACLK,
+         AXIS_ARESETN  => LAB04_AXIS_ARESETN,
+         S_AXIS_TVALID => LAB04_S_AXIS_TVALID,
+         S_AXIS_TDATA  => LAB04_S_AXIS_TDATA,
+         S_AXIS_TSTRB  => LAB04_S_AXIS_TSTRB,
+         S_AXIS_TKEEP  => LAB04_S_AXIS_TKEEP,
+         S_AXIS_TLAST  => LAB04_S_AXIS_TLAST,
+         S_AXIS_TDEST  => LAB04_S_AXIS_TDEST,
+         S_AXIS_TID    => LAB04_S_AXIS_TID,
+         S_AXIS_TUSER  => LAB04_S_AXIS_TUSER,
+         S_AXIS_TREADY => LAB04_S_AXIS_TREADY,
+         M_AXIS_TVALID => LAB04_M_AXIS_TVALID,
+         M_AXIS_TDATA  => LAB04_M_AXIS_TDATA,
+         M_AXIS_TSTRB  => LAB04_M_AXIS_TSTRB,
+         M_AXIS_TKEEP  => LAB04_M_AXIS_TKEEP,
+         M_AXIS_TLAST  => LAB04_M_AXIS_TLAST,
+         M_AXIS_TDEST  => LAB04_M_AXIS_TDEST,
+         M_AXIS_TID    => LAB04_M_AXIS_TID,
+         M_AXIS_TUSER  => LAB04_M_AXIS_TUSER,
+         M_AXIS_TREADY => LAB04_M_AXIS_TREADY);
+
+end mapping;
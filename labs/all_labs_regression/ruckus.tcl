@@ -0,0 +1,14 @@
+# Load RUCKUS environment and library
+source $::env(RUCKUS_PROC_TCL)
+
+# Load ruckus files
+loadRuckusTcl "$::env(MODULES)/surf"
+
+# Load the source code of every lab (wrapper and the lab's module)
+loadSource -dir "$::DIR_PATH/../01-AXI-Lite_register_endpoint/rtl"
+loadSource -dir "$::DIR_PATH/../02-AXI-stream_module/rtl"
+loadSource -dir "$::DIR_PATH/../03-AXI-Lite_crossbar/rtl"
+loadSource -dir "$::DIR_PATH/../04-AXI-stream_mux_demux/rtl"
+
+# Load the combined top level
+loadSource -dir "$::DIR_PATH/rtl"
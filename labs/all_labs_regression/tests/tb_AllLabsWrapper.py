@@ -0,0 +1,47 @@
+##############################################################################
+## This file is part of 'surf-tutorial'.
+## It is subject to the license terms in the LICENSE.txt file found in the
+## top-level directory of this distribution and at:
+##    https://confluence.slac.stanford.edu/display/ppareg/LICENSE.html.
+## No part of 'surf-tutorial', including this file,
+## may be copied, modified, propagated, or distributed except according to
+## the terms contained in the LICENSE.txt file.
+##############################################################################
+
+# dispatcher
+import importlib
+import os
+import sys
+from cocotb.regression import TestFactory
+
+labs_dir = os.path.join(os.path.dirname(__file__), '../..')
+
+# Shared surf-tutorial helpers (labs/python)
+sys.path.insert(0, os.path.join(labs_dir, 'python'))
+from surf_tutorial.harness import dispatch_factories, is_cocotb_module
+
+# (port prefix in AllLabsWrapper, lab directory, lab wrapper)
+LABS = [
+    ('LAB01_', '01-AXI-Lite_register_endpoint', 'MyAxiLiteEndpointWrapper'),
+    ('LAB02_', '02-AXI-stream_module',          'MyAxiStreamModuleWrapper'),
+    ('LAB03_', '03-AXI-Lite_crossbar',          'MyAxiLiteCrossbarWrapper'),
+    ('LAB04_', '04-AXI-stream_mux_demux',       'MyAxiStreamMuxDemuxWrapper'),
+]
+
+# TestFactory permutations of every lab, each running against its own wrapper instance
+factories = []
+for prefix, lab, wrapper in LABS:
+    sys.path.insert(0, os.path.join(labs_dir, lab, 'tests'))
+    tb = importlib.import_module(f'tb_{wrapper}')
+    factories += dispatch_factories(tb.factories, prefix, wrapper)
+
+def generate_tests():
+    # TestFactory.generate_tests() adds the tests to the module it is called from
+    for test_function, options in factories:
+        factory = TestFactory(test_function)
+        for name, values in options.items():
+            factory.add_option(name, values)
+        factory.generate_tests()
+
+if is_cocotb_module(__name__):
+    generate_tests()
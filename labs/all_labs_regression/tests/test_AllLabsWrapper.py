@@ -0,0 +1,83 @@
+##############################################################################
+## This file is part of 'surf-tutorial'.
+## It is subject to the license terms in the LICENSE.txt file found in the
+## top-level directory of this distribution and at:
+##    https://confluence.slac.stanford.edu/display/ppareg/LICENSE.html.
+## No part of 'surf-tutorial', including this file,
+## may be copied, modified, propagated, or distributed except according to
+## the terms contained in the LICENSE.txt file.
+##############################################################################
+
+# test_AllLabsWrapper
+import pytest
+import glob
+import os
+import sys
+
+# Shared surf-tutorial helpers (labs/python)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../python'))
+from surf_tutorial.runner import factory_testcases, run_sharded
+
+# Simulator side cocotb testbench, only imported here for its TestFactory permutations
+from tb_AllLabsWrapper import factories
+
+tests_dir = os.path.dirname(__file__)
+tests_module = 'AllLabsWrapper'
+
+##############################################################################
+
+@pytest.mark.parametrize(
+    "parameters", [
+        None
+    ])
+def test_AllLabsWrapper(parameters):
+
+    # https://github.com/themperek/cocotb-test#arguments-for-simulatorrun
+    # https://github.com/themperek/cocotb-test/blob/master/cocotb_test/simulator.py
+    run_sharded(
+        # Split the TestFactory tests across SHARDS simulator processes
+        testcases = factory_testcases(factories),
+
+        # top level HDL
+        toplevel = f'work.{tests_module}'.lower(),
+
+        # name of the file that contains @cocotb.test() -- the tb_*.py testbench, kept
+        # separate from this pytest launcher so the simulator only imports the testbench,
+        # not the runner and model helpers of the launcher (cocotb itself still imports pytest)
+        # https://docs.cocotb.org/en/stable/building.html?#envvar-MODULE
+        module = f'tb_{tests_module}',
+
+        # https://docs.cocotb.org/en/stable/building.html?#var-TOPLEVEL_LANG
+        toplevel_lang = 'vhdl',
+
+        # VHDL source files to include.
+        # Can be specified as a list or as a dict of lists with the library name as key,
+        # if the simulator supports named libraries.
+        vhdl_sources = {
+            'surf'   : glob.glob(f'{tests_dir}/../build/SRC_VHDL/surf/*'),
+            'ruckus' : glob.glob(f'{tests_dir}/../build/SRC_VHDL/ruckus/*'),
+            'work'   : glob.glob(f'{tests_dir}/../build/SRC_VHDL/work/*'),
+        },
+
+        # A dictionary of top-level parameters/generics.
+        parameters = parameters,
+
+        # The directory used to compile the tests. (default: sim_build)
+        sim_build = f'{tests_dir}/../build/{tests_module}',
+
+        # A dictionary of extra environment variables set in simulator process.
+        extra_env=parameters,
+
+        # Select a simulator
+        simulator="ghdl",
+
+        # use of synopsys package "std_logic_arith" needs the -fsynopsys option
+        # -frelaxed-rules option to allow IP integrator attributes
+        # When two operators are overloaded, give preference to the explicit declaration (-fexplicit)
+        vhdl_compile_args = ['-fsynopsys','-frelaxed-rules', '-fexplicit'],
+
+        ########################################################################
+        # Dump waveform to file ($ gtkwave build/AllLabsWrapper/AllLabsWrapper.ghw)
+        ########################################################################
+        sim_args =[f'--wave={tests_module}.ghw'],
+    )
@@ -0,0 +1,208 @@
+##############################################################################
+## This file is part of 'surf-tutorial'.
+## It is subject to the license terms in the LICENSE.txt file found in the
+## top-level directory of this distribution and at:
+##    https://confluence.slac.stanford.edu/display/ppareg/LICENSE.html.
+## No part of 'surf-tutorial', including this file,
+## may be copied, modified, propagated, or distributed except according to
+## the terms contained in the LICENSE.txt file.
+##############################################################################
+
+import functools
+import logging
+import time
+
+import cocotb
+from cocotb.result   import SimTimeoutError
+from cocotb.triggers import First, RisingEdge, Timer
+from cocotb.utils    import get_sim_time
+
+log = logging.getLogger("cocotb.tb")
+
+# Snapshot callbacks of the current test, see register_snapshot()
+_snapshots = []
+
+# Teardown callbacks of the current test, see register_teardown()
+_teardowns = []
+
+def register_teardown(teardown):
+    """
+    Registers a callback (e.g. closing a file) that is called at the end of the
+    current with_budget() test, whether it passed, failed or ran out of budget.
+    """
+    _teardowns.append(teardown)
+
+def run_teardowns():
+    """
+    Calls the registered teardown callbacks, last registered first, as they
+    may depend on earlier ones. A callback that raises is logged, the
+    following ones still run.
+
+    Called at the end of every with_budget() test (and of every DUT model
+    test), and at the start of a with_budget() test for the callbacks of a
+    test that ran without it, so no callback is ever dropped.
+    """
+    while _teardowns:
+        teardown = _teardowns.pop()
+        try:
+            teardown()
+        except Exception:
+            log.exception( f'Teardown {teardown.__qualname__}() failed' )
+
+# Outcome of the last with_budget() test of each DUT, by DUT name
+_passed = {}
+
+def previous_test_passed(dut):
+    """
+    True if the previous test on dut passed, False if it failed or was
+    aborted, which can leave operations in flight in its drivers and in the
+    DUT.
+
+    The outcome is recorded by with_budget() and consumed by this call, so a
+    test that ran without with_budget() after it (and recorded nothing) is
+    also reported as not passed.
+    """
+    return _passed.pop(dut._name, False)
+
+def register_snapshot(snapshot):
+    """
+    Registers a callback that returns a {name: value} dictionary describing the
+    testbench state (queues, outstanding frames, ...). The callbacks of the
+    current test are logged when it runs out of budget.
+    """
+    _snapshots.append(snapshot)
+
+class HandshakeMonitor:
+    """
+    Records the number of valid/ready handshakes on a channel (and of frames,
+    if a last signal is given, and of bytes, if a keep signal is given) and
+    the sim time of the last handshake.
+    Only samples every clock cycle while valid is asserted.
+
+    Parameters:
+    - clock: clock signal of the channel.
+    - valid: valid signal of the channel.
+    - ready: ready signal of the channel.
+    - last: optional last signal of the channel (AXI stream TLAST).
+    - keep: optional byte enable signal of the channel (AXI stream TKEEP).
+    """
+    def __init__(self, clock, valid, ready, last=None, keep=None):
+        self.clock = clock
+        self.valid = valid
+        self.ready = ready
+        self.last  = last
+        self.keep  = keep
+        self.count = 0
+        self.frames = 0
+        self.bytes = 0
+        self.last_time = None
+        cocotb.start_soon(self._run())
+
+    async def _run(self):
+        while True:
+            if not self.valid.value.is_resolvable or not self.valid.value:
+                await RisingEdge(self.valid)
+            await RisingEdge(self.clock)
+            if self.valid.value.is_resolvable and self.ready.value.is_resolvable and self.valid.value and self.ready.value:
+                self.count += 1
+                self.last_time = get_sim_time('ns')
+                if self.last is not None and self.last.value.is_resolvable and self.last.value:
+                    self.frames += 1
+                if self.keep is not None and self.keep.value.is_resolvable:
+                    self.bytes += bin(self.keep.value.integer).count('1')
+
+    def __repr__(self):
+        if self.last_time is None:
+            return 'no handshake'
+        return f'{self.count} handshakes, last at {self.last_time}ns'
+
+def _dut_ports(dut):
+    ports = {}
+    for handle in dut:
+        try:
+            ports[handle._name] = str(handle.value)
+        except Exception:
+            # Records, arrays and generics have no single value
+            pass
+    return ports
+
+def log_snapshot(dut, reason):
+    """Logs the registered testbench snapshots and the DUT port values."""
+    log.error( f'{reason} at {get_sim_time("ns")}ns' )
+    for snapshot in _snapshots:
+        for name, value in snapshot().items():
+            log.error( f'    {name} = {value}' )
+    for name, value in sorted(_dut_ports(dut).items()):
+        log.error( f'    {name} = {value}' )
+
+async def _wall_watchdog(wall_time, poll_ns):
+    start = time.monotonic()
+    while (time.monotonic() - start) < wall_time:
+        await Timer(poll_ns, 'ns')
+
+def with_budget(test_function, sim_time=None, sim_time_unit='ns', wall_time=None, poll_ns=1000):
+    """
+    Wraps a test function so it is aborted once it uses up its sim-time or
+    wall-time budget, instead of hanging (e.g. on a deadlocked sink.recv()).
+
+    The wrapped function keeps the name of test_function, so it can be used
+    in place of it in a TestFactory, and records its budget in a 'budget'
+    attribute.
+
+    Parameters:
+    - test_function: cocotb test coroutine function (dut, **options).
+    - sim_time: simulation time budget, in sim_time_unit (None = unlimited).
+    - sim_time_unit: unit of sim_time.
+    - wall_time: wall-clock time budget, in seconds (None = unlimited).
+    - poll_ns: simulation time between two checks of the wall-clock time.
+
+    Raises:
+    - cocotb.result.SimTimeoutError if a budget is exceeded, after logging a
+      snapshot of the registered testbench state and of the DUT ports.
+    """
+    @functools.wraps(test_function)
+    async def budgeted_test(dut, *args, **kwargs):
+        _snapshots.clear()
+        run_teardowns()
+        passed = False
+        start = time.monotonic()
+
+        # The outcome of the previous test stays recorded until the TB of
+        # this one reads it (see previous_test_passed())
+        try:
+            test = cocotb.start_soon(test_function(dut, *args, **kwargs))
+            triggers = [test.join()]
+
+            if sim_time is not None:
+                triggers.append(Timer(sim_time, sim_time_unit))
+
+            if wall_time is not None:
+                wall_timeout = cocotb.start_soon(_wall_watchdog(wall_time, poll_ns))
+                triggers.append(wall_timeout.join())
+
+            await First(*triggers)
+
+            if wall_time is not None:
+                wall_timeout.kill()
+
+            if test.done():
+                result = test.result()
+                passed = True
+                return result
+
+            if wall_time is not None and (time.monotonic() - start) >= wall_time:
+                reason = f'{test_function.__name__}() exceeded its wall-time budget of {wall_time}s'
+            else:
+                reason = f'{test_function.__name__}() exceeded its sim-time budget of {sim_time}{sim_time_unit}'
+
+            test.kill()
+            log_snapshot(dut, reason)
+            raise SimTimeoutError(reason)
+        finally:
+            _passed[dut._name] = passed
+            run_teardowns()
+
+    # Also enforced by the DUT models (see tlm.run_model())
+    budgeted_test.budget = {'sim_time': sim_time, 'sim_time_unit': sim_time_unit, 'wall_time': wall_time}
+
+    return budgeted_test
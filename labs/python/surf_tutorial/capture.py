@@ -0,0 +1,228 @@
+##############################################################################
+## This file is part of 'surf-tutorial'.
+## It is subject to the license terms in the LICENSE.txt file found in the
+## top-level directory of this distribution and at:
+##    https://confluence.slac.stanford.edu/display/ppareg/LICENSE.html.
+## No part of 'surf-tutorial', including this file,
+## may be copied, modified, propagated, or distributed except according to
+## the terms contained in the LICENSE.txt file.
+##############################################################################
+
+#-----------------------------------------------------------------------------
+# AXI stream capture file format (all fields little endian):
+#
+#   File header  : 8 byte magic b'AXISCAP2'
+#   Frame record : uint32 length, uint32 tid, uint32 tdest, uint32 tuser_count,
+#                  followed by 'tuser_count' uint32 tuser values
+#                  and by 'length' bytes of raw tdata
+#
+# tuser is stored per tdata byte like in cocotbext-axi frames (every byte of
+# a beat has the value of that beat), or as a single value when it is the
+# same on every byte. tid and tdest are stored once per frame, with their
+# value on the first beat.
+#
+# The b'AXISCAP1' files of the previous version (a single uint32 tuser, of the
+# first beat, in place of tuser_count and the tuser values) can still be read.
+#
+# Records are only ever appended, so a capture can be extended by later
+# simulations and a truncated last record (killed simulation) is ignored.
+#-----------------------------------------------------------------------------
+
+import mmap
+import os
+import struct
+
+import cocotb
+from cocotbext.axi import AxiStreamFrame, AxiStreamMonitor
+
+CAPTURE_MAGIC    = b'AXISCAP2'
+CAPTURE_MAGIC_V1 = b'AXISCAP1'
+CAPTURE_RECORD   = struct.Struct('<IIII')
+CAPTURE_TUSER    = struct.Struct('<I')
+
+def _sideband(value):
+    # Per-beat sideband values (list) are reduced to the value of the first beat
+    if value is None:
+        return 0
+    if isinstance(value, (int, bool)):
+        return int(value)
+    return int(value[0]) if len(value) else 0
+
+def _sideband_beats(value):
+    # Per-byte sideband values, a single value when it is the same on every byte
+    if value is None:
+        return [0]
+    if isinstance(value, (int, bool)):
+        return [int(value)]
+    values = [int(v) for v in value]
+    if not values or all(v == values[0] for v in values):
+        return values[:1] or [0]
+    return values
+
+class AxiStreamCaptureWriter:
+    """
+    Appends AXI stream frames to a capture file.
+
+    Parameters:
+    - path: capture file path, created (with its header) if it does not exist.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'ab')
+        if self.file.tell() == 0:
+            self.file.write(CAPTURE_MAGIC)
+            self.file.flush()
+        else:
+            with open(path, 'rb') as f:
+                magic = f.read(len(CAPTURE_MAGIC))
+            if magic != CAPTURE_MAGIC:
+                self.file.close()
+                raise ValueError(f'{path}: not an {CAPTURE_MAGIC.decode()} capture file, cannot append to it')
+
+    def write(self, frame):
+        tuser = _sideband_beats(frame.tuser)
+        self.file.write(CAPTURE_RECORD.pack(
+            len(frame.tdata),
+            _sideband(frame.tid),
+            _sideband(frame.tdest),
+            len(tuser),
+        ))
+        for value in tuser:
+            self.file.write(CAPTURE_TUSER.pack(value))
+        self.file.write(frame.tdata)
+
+        # Flush every frame so the file stays valid if the test is killed
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+class AxiStreamCaptureReader:
+    """
+    Memory-mapped reader of a capture file.
+
+    Iterating over the reader yields one AxiStreamFrame at a time, so only
+    the frame being replayed is copied into Python memory.
+
+    Parameters:
+    - path: capture file path.
+    """
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size < len(CAPTURE_MAGIC):
+                raise ValueError(f'{path}: not an AXI stream capture file')
+            self.mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.version = {CAPTURE_MAGIC_V1: 1, CAPTURE_MAGIC: 2}.get(self.mmap[:len(CAPTURE_MAGIC)])
+        if self.version is None:
+            self.mmap.close()
+            raise ValueError(f'{path}: not an AXI stream capture file')
+
+    def __iter__(self):
+        offset = len(CAPTURE_MAGIC)
+        size   = len(self.mmap)
+        while offset + CAPTURE_RECORD.size <= size:
+            length, tid, tdest, tuser = CAPTURE_RECORD.unpack_from(self.mmap, offset)
+            offset += CAPTURE_RECORD.size
+            if self.version > 1:
+                count = tuser
+                if offset + count*CAPTURE_TUSER.size > size:
+                    break
+                tuser = [CAPTURE_TUSER.unpack_from(self.mmap, offset + k*CAPTURE_TUSER.size)[0] for k in range(count)]
+                tuser = tuser[0] if count == 1 else tuser
+                offset += count*CAPTURE_TUSER.size
+            if offset + length > size:
+                break
+            yield AxiStreamFrame(self.mmap[offset:offset+length], tid=tid, tdest=tdest, tuser=tuser)
+            offset += length
+
+    def close(self):
+        self.mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+class AxiStreamCapture:
+    """
+    Monitors an AXI stream bus and appends every frame seen on it to a capture file.
+
+    Parameters:
+    - bus, clock, reset, reset_active_level: same as cocotbext.axi.AxiStreamMonitor.
+    - path: capture file path.
+    """
+    def __init__(self, bus, clock, path, reset=None, reset_active_level=True):
+        self.monitor = AxiStreamMonitor(bus, clock, reset, reset_active_level)
+        self.writer  = AxiStreamCaptureWriter(path)
+        self.frames  = 0
+        cocotb.start_soon(self._run())
+
+    async def _run(self):
+        while True:
+            frame = await self.monitor.recv()
+            self.writer.write(frame)
+            self.frames += 1
+
+    def close(self):
+        self.writer.close()
+
+async def replay_capture(source, path, depth=16):
+    """
+    Replays a capture file into an AxiStreamSource.
+
+    The source queue is limited to 'depth' frames so the capture is read
+    from the file only as fast as the DUT consumes it.
+
+    Parameters:
+    - source: cocotbext.axi.AxiStreamSource to send the frames with.
+    - path: capture file path.
+    - depth: maximum number of frames queued in the source.
+
+    Returns:
+    - The number of replayed frames.
+    """
+    source.queue_occupancy_limit_frames = depth
+    count = 0
+    with AxiStreamCaptureReader(path) as reader:
+        for frame in reader:
+            await source.send(frame)
+            count += 1
+    return count
+
+def compare_captures(path, golden_path):
+    """
+    Compares a capture file against a golden capture file, frame by frame.
+
+    Parameters:
+    - path: capture file path.
+    - golden_path: golden capture file path.
+
+    Returns:
+    - A list of (frame index, description) tuples, empty if the captures match.
+    """
+    mismatches = []
+    with AxiStreamCaptureReader(path) as reader, AxiStreamCaptureReader(golden_path) as golden:
+        frames        = iter(reader)
+        golden_frames = iter(golden)
+        index = 0
+        while True:
+            frame        = next(frames, None)
+            golden_frame = next(golden_frames, None)
+            if frame is None and golden_frame is None:
+                break
+            if frame is None or golden_frame is None:
+                mismatches.append((index, 'frame count differs'))
+                break
+            for field in ['tdata', 'tid', 'tdest', 'tuser']:
+                if getattr(frame, field) != getattr(golden_frame, field):
+                    mismatches.append((index, f'{field} differs'))
+            index += 1
+    return mismatches
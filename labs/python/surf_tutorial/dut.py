@@ -0,0 +1,21 @@
+##############################################################################
+## This file is part of 'surf-tutorial'.
+## It is subject to the license terms in the LICENSE.txt file found in the
+## top-level directory of this distribution and at:
+##    https://confluence.slac.stanford.edu/display/ppareg/LICENSE.html.
+## No part of 'surf-tutorial', including this file,
+## may be copied, modified, propagated, or distributed except according to
+## the terms contained in the LICENSE.txt file.
+##############################################################################
+
+import sys
+
+def is_model(dut):
+    """
+    True if dut is a DUT model (surf_tutorial.tlm.DutModel, SIM_MODE=model).
+
+    The models are only created by tlm.run_model(), which has imported tlm,
+    so the simulator does not import it just for this check.
+    """
+    tlm = sys.modules.get('surf_tutorial.tlm')
+    return tlm is not None and isinstance(dut, tlm.DutModel)
@@ -0,0 +1,84 @@
+##############################################################################
+## This file is part of 'surf-tutorial'.
+## It is subject to the license terms in the LICENSE.txt file found in the
+## top-level directory of this distribution and at:
+##    https://confluence.slac.stanford.edu/display/ppareg/LICENSE.html.
+## No part of 'surf-tutorial', including this file,
+## may be copied, modified, propagated, or distributed except according to
+## the terms contained in the LICENSE.txt file.
+##############################################################################
+
+#-----------------------------------------------------------------------------
+# Multi-DUT harness: runs the tests of several labs in one simulation of a
+# combined top level (labs/all_labs_regression/rtl/AllLabsWrapper.vhd) where
+# the ports of each lab's wrapper are prefixed with the lab (LAB01_S_AXI_ACLK).
+#-----------------------------------------------------------------------------
+
+import functools
+import logging
+import os
+
+import cocotb
+
+class LabDut:
+    """
+    View of one lab's wrapper in the combined top level: its handles are
+    found under their wrapper port names (view.S_AXI_ACLK is
+    dut.LAB01_S_AXI_ACLK), so the lab's TB and tests run unchanged.
+
+    Parameters:
+    - dut: cocotb handle of the combined top level.
+    - prefix: port prefix of the lab (e.g. 'LAB01_').
+    - name: name of the lab's wrapper, used for the logger.
+    """
+    def __init__(self, dut, prefix, name):
+        self._dut = dut
+        self._prefix = prefix
+        self._name = name
+        self._log = logging.getLogger(f'cocotb.{name}')
+        self.log = self._log
+
+    def __getattr__(self, name):
+        return getattr(self._dut, self._prefix + name)
+
+    def __dir__(self):
+        # cocotb_bus looks the bus signals up with dir()
+        return [name[len(self._prefix):] for name in dir(self._dut) if name.startswith(self._prefix)]
+
+    def __iter__(self):
+        for handle in self._dut:
+            if handle._name.startswith(self._prefix):
+                yield handle
+
+def dispatch_factories(factories, prefix, name):
+    """
+    Returns the TestFactory permutations of a lab's tb_*.py module, with every
+    test function running against the lab's view of the combined top level.
+
+    The test functions are renamed with the lowercase prefix (e.g.
+    'lab02_run_test'), so the generated tests of different labs do not clash.
+
+    Parameters:
+    - factories: the 'factories' list of the lab's tb_*.py module.
+    - prefix: port prefix of the lab in the combined top level.
+    - name: name of the lab's wrapper.
+    """
+    dispatched = []
+    for test_function, options in factories:
+
+        @functools.wraps(test_function)
+        async def lab_test(dut, *args, _test_function=test_function, **kwargs):
+            return await _test_function(LabDut(dut, prefix, name), *args, **kwargs)
+
+        lab_test.__name__ = f'{prefix.lower()}{test_function.__name__}'
+        lab_test.__qualname__ = lab_test.__name__
+        dispatched.append((lab_test, options))
+    return dispatched
+
+def is_cocotb_module(name):
+    """
+    True if the module 'name' is one of the cocotb test modules (MODULE) of
+    the running simulation, False outside the simulator or when the module is
+    only imported by another one (e.g. a lab's tb_*.py by tb_AllLabsWrapper).
+    """
+    return cocotb.SIM_NAME is not None and name in [s.strip() for s in os.getenv('MODULE', '').split(',')]
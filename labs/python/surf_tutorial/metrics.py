@@ -0,0 +1,129 @@
+##############################################################################
+## This file is part of 'surf-tutorial'.
+## It is subject to the license terms in the LICENSE.txt file found in the
+## top-level directory of this distribution and at:
+##    https://confluence.slac.stanford.edu/display/ppareg/LICENSE.html.
+## No part of 'surf-tutorial', including this file,
+## may be copied, modified, propagated, or distributed except according to
+## the terms contained in the LICENSE.txt file.
+##############################################################################
+
+#-----------------------------------------------------------------------------
+# Live metrics of the AXI stream testbenches, for long (soak) simulations.
+#
+# With METRICS_FILE=<file.jsonl>, the testbench appends one JSON line to the
+# file every METRICS_INTERVAL seconds of wall time (default 10), e.g.
+#
+#   {"test": "run_test_001", "sim_time_ns": 1510.0, "wall_time_s": 10.0,
+#    "cycles_per_s": 15100.0, "frames_sent": 32, "frames_received": 31,
+#    "bytes_sent": 528, "bytes_received": 512, "in_flight_frames": 1,
+#    "source_queue_frames": 0, "sink_queue_frames": 0, "python_rss_bytes": ...}
+#
+# The counters come from the HandshakeMonitors, so the exporter itself only
+# wakes up every poll_ns of sim time to look at the wall clock.
+# Watch a run with: tail -f <file.jsonl>
+#-----------------------------------------------------------------------------
+
+import json
+import os
+import resource
+import time
+
+import cocotb
+from cocotb.triggers import Timer
+from cocotb.utils    import get_sim_time
+
+from surf_tutorial.shard import shard_path
+
+def metrics_file():
+    path = os.getenv('METRICS_FILE')
+    return shard_path(path) if path else None
+
+def metrics_interval():
+    return float(os.getenv('METRICS_INTERVAL', '10'))
+
+def python_rss():
+    """Resident set size of the Python (simulator) process, in bytes."""
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * resource.getpagesize()
+    except OSError:
+        # Peak RSS (kB on Linux) where /proc is not available
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+def _test_name():
+    test = getattr(cocotb.regression_manager, '_test', None)
+    return getattr(test, '__qualname__', None)
+
+class MetricsExporter:
+    """
+    Appends a metrics snapshot of an AXI stream testbench to a JSON lines file
+    every 'interval' seconds of wall time, and once more on close().
+
+    Parameters:
+    - path: metrics file, appended to.
+    - period_ns: clock period, to convert the sim time into cycles.
+    - source, sink: AxiStreamSource and AxiStreamSink of the testbench.
+    - tx, rx: HandshakeMonitors (with last and keep) of the source and sink channels.
+    - interval: wall time between snapshots, in seconds.
+    - poll_ns: sim time between two checks of the wall time.
+    """
+    def __init__(self, path, period_ns, source, sink, tx, rx, interval=10.0, poll_ns=10000):
+        self.path = path
+        self.period_ns = period_ns
+        self.source = source
+        self.sink = sink
+        self.tx = tx
+        self.rx = rx
+        self.interval = interval
+        self.poll_ns = poll_ns
+        self.test = _test_name()
+
+        self.file = open(path, 'a')
+        self._start_wall = time.monotonic()
+        self._start_sim  = get_sim_time('ns')
+        self._last_wall  = self._start_wall
+        self._last_sim   = self._start_sim
+        self._run_cr = cocotb.start_soon(self._run())
+
+    def snapshot(self):
+        wall = time.monotonic()
+        sim  = get_sim_time('ns')
+        cycles_per_s = None
+        if wall > self._last_wall:
+            cycles_per_s = (sim - self._last_sim) / self.period_ns / (wall - self._last_wall)
+        self._last_wall = wall
+        self._last_sim  = sim
+        return {
+            'test'                : self.test,
+            'sim_time_ns'         : sim,
+            'wall_time_s'         : round(wall - self._start_wall, 3),
+            'cycles_per_s'        : cycles_per_s,
+            'frames_sent'         : self.tx.frames,
+            'frames_received'     : self.rx.frames,
+            'bytes_sent'          : self.tx.bytes,
+            'bytes_received'      : self.rx.bytes,
+            'in_flight_frames'    : self.tx.frames - self.rx.frames,
+            'source_queue_frames' : self.source.queue_occupancy_frames,
+            'sink_queue_frames'   : self.sink.queue_occupancy_frames,
+            'python_rss_bytes'    : python_rss(),
+        }
+
+    def write(self):
+        self.file.write(json.dumps(self.snapshot()) + '\n')
+
+        # Flush every snapshot so the file can be watched while the simulation runs
+        self.file.flush()
+
+    async def _run(self):
+        while True:
+            await Timer(self.poll_ns, 'ns')
+            if (time.monotonic() - self._last_wall) >= self.interval:
+                self.write()
+
+    def close(self):
+        if self.file.closed:
+            return
+        self._run_cr.kill()
+        self.write()
+        self.file.close()
@@ -0,0 +1,200 @@
+##############################################################################
+## This file is part of 'surf-tutorial'.
+## It is subject to the license terms in the LICENSE.txt file found in the
+## top-level directory of this distribution and at:
+##    https://confluence.slac.stanford.edu/display/ppareg/LICENSE.html.
+## No part of 'surf-tutorial', including this file,
+## may be copied, modified, propagated, or distributed except according to
+## the terms contained in the LICENSE.txt file.
+##############################################################################
+
+#-----------------------------------------------------------------------------
+# Cycle-approximate Python models of the lab wrappers (see tlm.py).
+# Each model follows the lab's ref_files/*_final.vhd design.
+#-----------------------------------------------------------------------------
+
+import abc
+import os
+
+from cocotbext.axi import AxiStreamFrame
+from cocotbext.axi.constants import AxiResp
+
+from surf_tutorial.tlm import AxiStreamDutModel, DutModel, ModelAxiLiteMaster, ModelSignal
+
+class AxiLiteDutModel(DutModel):
+    """
+    Base class of the AXI-Lite DUT models (S_AXI slave port).
+    Subclasses implement read_word() and write_word().
+
+    Parameters:
+    - name, period_ns: see DutModel.
+    - address_width: width of the S_AXI address bus.
+    - latency: cycles per 32-bit access.
+    - EN_ERROR_RESP: wrapper generic, AXI error responses are forced to OKAY if False.
+    """
+    def __init__(self, name, period_ns, address_width, latency, EN_ERROR_RESP=False):
+        super().__init__(name, 'S_AXI_ACLK', 'S_AXI_ARESETN', period_ns)
+        self.EN_ERROR_RESP = ModelSignal('EN_ERROR_RESP', int(EN_ERROR_RESP))
+        self.axil_master = ModelAxiLiteMaster(self, address_width, latency)
+        self.handle_reset()
+
+    def error_resp(self, resp):
+        return resp if self.EN_ERROR_RESP.value else AxiResp.OKAY
+
+    @abc.abstractmethod
+    def read_word(self, address):
+        """Returns the (data, resp) of a 32-bit read."""
+
+    @abc.abstractmethod
+    def write_word(self, address, data, strb):
+        """Writes the 'strb' byte lanes of a 32-bit word, returns the resp."""
+
+def _strobe(value, data, strb):
+    for lane in range(4):
+        if strb & (1 << lane):
+            mask = 0xFF << (8*lane)
+            value = (value & ~mask) | (data & mask)
+    return value
+
+class MyAxiLiteEndpointModel(AxiLiteDutModel):
+    """
+    Model of MyAxiLiteEndpointWrapper (lab 01) register map:
+
+      0x000       : PRJ_VERSION (R)
+      0x004       : scratchPad (RW)
+      0x008       : cnt (R), counts the cycles while enableCnt is set
+      0x00C       : BIT0 = startCnt, BIT1 = stopCnt strobes (W)
+      0x010[8]    : enableCnt (R)
+      0x100-0x113 : GIT_HASH (R, 160-bit)
+      0x200-0x2FF : BUILD_STRING (R, 64x32-bit)
+    """
+    def __init__(self, EN_ERROR_RESP=False, PRJ_VERSION=None, GIT_HASH=0, BUILD_STRING=None):
+        if PRJ_VERSION is None:
+            PRJ_VERSION = int(os.getenv('PRJ_VERSION', '0'), 0)
+        if BUILD_STRING is None:
+            BUILD_STRING = 'MyAxiLiteEndpointWrapper: Python model'
+        self.PRJ_VERSION  = PRJ_VERSION
+        self.GIT_HASH     = GIT_HASH
+        self.BUILD_STRING = BUILD_STRING.encode('utf-8')[:256].ljust(256, b'\x00')
+        super().__init__('MyAxiLiteEndpointWrapper', 10.0, 12, 4, EN_ERROR_RESP)
+
+    def handle_reset(self):
+        self.scratchPad = 0xDEADBEEF
+        self._cnt = 0
+        self._enable_cycle = None
+
+    def _count(self):
+        # r.cnt increments every cycle once r.enableCnt is set
+        if self._enable_cycle is None:
+            return self._cnt
+        return (self._cnt + max(0, self.cycle() - self._enable_cycle)) & 0xFFFFFFFF
+
+    def read_word(self, address):
+        if address == 0x000:
+            return self.PRJ_VERSION, AxiResp.OKAY
+        if address == 0x004:
+            return self.scratchPad, AxiResp.OKAY
+        if address == 0x008:
+            return self._count(), AxiResp.OKAY
+        if address == 0x010:
+            return int(self._enable_cycle is not None) << 8, AxiResp.OKAY
+        if 0x100 <= address < 0x114:
+            return (self.GIT_HASH >> (8*(address-0x100))) & 0xFFFFFFFF, AxiResp.OKAY
+        if 0x200 <= address < 0x300:
+            return int.from_bytes(self.BUILD_STRING[address-0x200:address-0x200+4], 'little'), AxiResp.OKAY
+        return 0, self.error_resp(AxiResp.DECERR)
+
+    def write_word(self, address, data, strb):
+        if address == 0x004:
+            self.scratchPad = _strobe(self.scratchPad, data, strb)
+            return AxiResp.OKAY
+        if address == 0x00C:
+            # The strobes take effect on r.enableCnt two cycles after the write
+            data = _strobe(0, data, strb)
+            if data & 0x1 and self._enable_cycle is None:
+                self._enable_cycle = self.cycle() + 2
+            if data & 0x2 and self._enable_cycle is not None:
+                self._cnt = (self._cnt + max(0, self.cycle() + 2 - self._enable_cycle)) & 0xFFFFFFFF
+                self._enable_cycle = None
+            return AxiResp.OKAY
+        if address in [0x000, 0x008, 0x010] or 0x100 <= address < 0x114 or 0x200 <= address < 0x300:
+            # Read-only registers ignore the write
+            return AxiResp.OKAY
+        return self.error_resp(AxiResp.DECERR)
+
+class MyAxiLiteCrossbarModel(AxiLiteDutModel):
+    """
+    Model of MyAxiLiteCrossbarWrapper (lab 03) address decode:
+
+      genAxiLiteConfig(2, 0x0000_0000, 22, 20)
+        MASTER[0] : 0x0000_0000-0x000F_FFFF : AxiDualPortRam (4kB)
+        MASTER[1] : 0x0010_0000-0x001F_FFFF : cascade crossbar
+          SLAVE[0] : 0x0010_2000-0x0010_2FFF : AxiDualPortRam (4kB)
+          SLAVE[1] : 0x0016_0000-0x0017_FFFF : AxiDualPortRam (4kB)
+
+    The 4kB RAMs (ADDR_WIDTH_G=10 x 32-bit) alias over their address range,
+    unmapped addresses return DECERR.
+    """
+    # (base address, address bits, RAM index)
+    REGIONS = [
+        (0x0000_0000, 20, 0),
+        (0x0010_2000, 12, 1),
+        (0x0016_0000, 17, 2),
+    ]
+
+    def __init__(self, EN_ERROR_RESP=False):
+        self.rams = [[0]*1024 for _ in range(3)]
+        super().__init__('MyAxiLiteCrossbarWrapper', 10.0, 32, 5, EN_ERROR_RESP)
+
+    def handle_reset(self):
+        # The AxiDualPortRam contents are not cleared by the reset
+        pass
+
+    def _decode(self, address):
+        for base, bits, ram in self.REGIONS:
+            if (address >> bits) == (base >> bits):
+                return self.rams[ram], (address >> 2) & 0x3FF
+        return None, None
+
+    def read_word(self, address):
+        ram, index = self._decode(address)
+        if ram is None:
+            return 0, self.error_resp(AxiResp.DECERR)
+        return ram[index], AxiResp.OKAY
+
+    def write_word(self, address, data, strb):
+        ram, index = self._decode(address)
+        if ram is None:
+            return self.error_resp(AxiResp.DECERR)
+        ram[index] = _strobe(ram[index], data, strb)
+        return AxiResp.OKAY
+
+class MyAxiStreamModuleModel(AxiStreamDutModel):
+    """
+    Model of MyAxiStreamModuleWrapper (lab 02): adds +1 to every TDATA beat
+    (TDATA_NUM_BYTES wide, unused bytes of the last beat are zero) and
+    passes tid/tdest/tuser through, with one cycle of latency.
+    """
+    def __init__(self, **generics):
+        super().__init__('MyAxiStreamModuleWrapper', 10.0, latency=1, **generics)
+
+    def transfer(self, frame):
+        width = self.byte_lanes
+        tdata = bytearray()
+        for offset in range(0, len(frame.tdata), width):
+            beat = frame.tdata[offset:offset+width]
+            value = (int.from_bytes(beat, 'little') + 1) % 2**(8*width)
+            tdata += value.to_bytes(width, 'little')[:len(beat)]
+        return AxiStreamFrame(tdata, tid=frame.tid, tdest=frame.tdest, tuser=frame.tuser)
+
+class MyAxiStreamMuxDemuxModel(AxiStreamDutModel):
+    """
+    Model of MyAxiStreamMuxDemuxWrapper (lab 04): the AxiStreamDeMux routes
+    every frame by tdest and the AxiStreamMux merges them back, so the
+    frames come out unchanged and in order.
+    """
+    def __init__(self, **generics):
+        super().__init__('MyAxiStreamMuxDemuxWrapper', 5.0, latency=3, **generics)
+
+    def transfer(self, frame):
+        return AxiStreamFrame(frame.tdata, tid=frame.tid, tdest=frame.tdest, tuser=frame.tuser)
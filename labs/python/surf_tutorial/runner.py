@@ -0,0 +1,279 @@
+##############################################################################
+## This file is part of 'surf-tutorial'.
+## It is subject to the license terms in the LICENSE.txt file found in the
+## top-level directory of this distribution and at:
+##    https://confluence.slac.stanford.edu/display/ppareg/LICENSE.html.
+## No part of 'surf-tutorial', including this file,
+## may be copied, modified, propagated, or distributed except according to
+## the terms contained in the LICENSE.txt file.
+##############################################################################
+
+import itertools
+import logging
+import os
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
+
+from cocotb_test.simulator import Ghdl, run
+
+log = logging.getLogger(__name__)
+
+# Regression modes, selected with the SIM_MODE environment variable
+SIM_MODES = ['rtl', 'model', 'crosscheck']
+
+def sim_mode():
+    mode = os.getenv('SIM_MODE', 'rtl')
+    if mode not in SIM_MODES:
+        raise ValueError(f'SIM_MODE={mode} is not one of {SIM_MODES}')
+    return mode
+
+def factory_testcases(factories):
+    """
+    Returns the names that cocotb's TestFactory.generate_tests() gives to the
+    generated tests, without having to load the simulator.
+
+    Parameters:
+    - factories: list of (test_function, {option_name: [values]}) tuples,
+                 in the same order as they are generated in the test module.
+
+    Returns:
+    - A list of test names (e.g. ['run_test_001', 'run_test_002', ...]).
+    """
+    testcases = []
+    for test_function, options in factories:
+        count = 1
+        for values in options.values():
+            count *= len(values)
+        testcases += [f'{test_function.__name__}_{index:03d}' for index in range(1, count+1)]
+    return testcases
+
+def merge_results(results_files, merged_file):
+    """
+    Merges the cocotb results XML files of several shards into one file.
+
+    Parameters:
+    - results_files: list of the shard results XML files.
+    - merged_file: path of the merged results XML file.
+
+    Returns:
+    - The number of failed tests in the merged results.
+    """
+    merged = ET.Element('testsuites', name='results')
+    suite  = ET.SubElement(merged, 'testsuite', name='all', package='all')
+
+    for results_file in results_files:
+        tree = ET.parse(results_file)
+        for ts in tree.iter('testsuite'):
+            for tc in ts.findall('testcase'):
+                suite.append(tc)
+
+    ET.ElementTree(merged).write(merged_file, encoding='UTF-8', xml_declaration=True)
+
+    failed = 0
+    for tc in suite.iter('testcase'):
+        for _ in tc.iter('failure'):
+            log.error(f'Failed: {tc.get("classname")}::{tc.get("name")}')
+            failed += 1
+    return failed
+
+def _shard_sim_args(sim_args, index):
+    # The shards share the sim_build directory, so each one gets its own waveform file
+    shard_args = []
+    for arg in sim_args or []:
+        if arg.startswith(('--wave=', '--vcd=', '--fst=')):
+            root, ext = os.path.splitext(arg)
+            arg = f'{root}_shard{index}{ext}'
+        shard_args.append(arg)
+    return shard_args
+
+class _ElaboratedGhdl(Ghdl):
+    # GHDL for the shards, which run the design that run_sharded() analyzed
+    # and elaborated. cocotb_test would otherwise compare the sources with the
+    # mtime of an executable in sim_build, which mcode GHDL does not write, and
+    # analyze the design again in every shard, concurrently in the same libraries.
+    def outdated(self, output, dependencies):
+        return False
+
+def _run_shard(index, testcases, kwargs):
+
+    # Each shard runs in sim_build, where the design was elaborated,
+    # with its own results file and waveform file
+    results_file = os.path.join(kwargs['sim_build'], f'results_shard{index}.xml')
+    os.environ['COCOTB_RESULTS_FILE'] = results_file
+    if os.path.isfile(results_file):
+        os.remove(results_file)
+
+    # SHARD also gives the relative output files of the testbench
+    # (captures, metrics) a name per shard, see surf_tutorial.shard
+    extra_env = dict(kwargs.get('extra_env') or {}, SHARD=str(index))
+    kwargs = dict(kwargs, testcase=','.join(testcases), extra_env=extra_env,
+                  sim_args=_shard_sim_args(kwargs.get('sim_args'), index))
+
+    try:
+        # Same simulator selection as cocotb_test's run(): SIM has priority
+        if (os.getenv('SIM') or kwargs.get('simulator')) == 'ghdl':
+            _ElaboratedGhdl(**{key: value for key, value in kwargs.items() if key != 'simulator'}).run()
+        else:
+            run(**kwargs)
+    except SystemExit as e:
+        # Failed tests are collected from the results file during the merge.
+        # No results file means the simulator itself terminated abnormally.
+        if not os.path.isfile(results_file):
+            raise RuntimeError(f'shard{index}: {e}') from None
+
+    return results_file
+
+def run_sharded(testcases, shards=None, **kwargs):
+    """
+    Drop-in replacement for cocotb_test.simulator.run() that splits the
+    testcases into shards and runs each shard in its own simulator process.
+
+    The design is elaborated once (compile_only) into sim_build, then the
+    shards run in parallel in sim_build using the TESTCASE filter, each with
+    its own results file (results_shard<N>.xml) and waveform file
+    (<name>_shard<N>.ghw). The SHARD=<N> environment variable gives the
+    relative output files of the testbench a name per shard too (see
+    surf_tutorial.shard). The results of all shards are merged into
+    sim_build/results.xml.
+
+    Parameters:
+    - testcases: list of test names in the cocotb MODULE (see factory_testcases()).
+    - shards: number of parallel simulator processes. Defaults to the
+              SHARDS environment variable, or 1 if not set.
+    - kwargs: arguments passed to cocotb_test.simulator.run().
+
+    Returns:
+    - The path of the (merged) results XML file.
+    """
+    if shards is None:
+        shards = int(os.getenv('SHARDS', '1'))
+    shards = max(1, min(shards, len(testcases)))
+
+    # Single shard is the same as the regular single process simulation
+    if shards == 1:
+        return run(**kwargs)
+
+    # Elaborate the design once and share it with all the shards
+    run(compile_only=True, **kwargs)
+
+    # Round robin the testcases so each shard gets a mix of the permutations
+    groups = [testcases[index::shards] for index in range(shards)]
+
+    with ProcessPoolExecutor(max_workers=shards) as executor:
+        results_files = list(executor.map(_run_shard, range(shards), groups, itertools.repeat(kwargs)))
+
+    merged_file = os.path.join(kwargs['sim_build'], 'results.xml')
+    failed = merge_results(results_files, merged_file)
+    log.info(f'Results file: {merged_file}')
+
+    if failed:
+        raise SystemExit(f'FAILED {failed} tests.')
+
+    return merged_file
+
+def _results_outcomes(results_file):
+    # {test name: True if passed} of a cocotb results XML file
+    outcomes = {}
+    for tc in ET.parse(results_file).iter('testcase'):
+        outcomes[tc.get('name')] = not any(True for _ in tc.iter('failure'))
+    return outcomes
+
+def run_regression(factories, model, captures=(), **kwargs):
+    """
+    Runs the TestFactory tests of a tb_*.py MODULE in the mode selected with
+    the SIM_MODE environment variable:
+
+      rtl        : in the simulator, see run_sharded() (default)
+      model      : against the Python model of the DUT, without simulator
+      crosscheck : both, then checks that the model and the RTL agree on the
+                   outcome of every test and on the capture files
+
+    Parameters:
+    - factories: the 'factories' list of the tb_*.py module.
+    - model: DUT model class (see surf_tutorial.models).
+    - captures: capture files (AXIS_CAPTURE=1) compared in crosscheck mode.
+    - kwargs: arguments passed to cocotb_test.simulator.run().
+
+    Returns:
+    - The path of the RTL results XML file (None in model mode).
+    """
+    mode = sim_mode()
+    testcases = factory_testcases(factories)
+
+    if mode == 'rtl':
+        return run_sharded(testcases=testcases, **kwargs)
+
+    # Lazy import, only the model and crosscheck modes need the models
+    from surf_tutorial.capture import compare_captures
+    from surf_tutorial.tlm import run_model
+
+    sim_build = kwargs['sim_build']
+    model_dir = os.path.join(sim_build, 'model')
+
+    # The captures are only recorded to be compared in crosscheck mode
+    if mode != 'crosscheck':
+        captures = ()
+    env = {'AXIS_CAPTURE': '1'} if captures else {}
+
+    # The capture files are appended to, start from empty ones
+    for capture in captures:
+        for path in [os.path.join(model_dir, capture), os.path.join(sim_build, capture)]:
+            if os.path.isfile(path):
+                os.remove(path)
+
+    model_results = run_model(factories, model, work_dir=model_dir, env=env)
+    model_failed = [name for name, error in model_results.items() if error is not None]
+
+    if mode == 'model':
+        for name in model_failed:
+            log.error(f'Failed: {name}: {model_results[name]!r}')
+        if model_failed:
+            raise SystemExit(f'FAILED {len(model_failed)} tests.')
+        return None
+
+    # Single simulator process, so the RTL captures are all in sim_build
+    os.makedirs(sim_build, exist_ok=True)
+    results_file = os.path.join(sim_build, 'results.xml')
+    if os.path.isfile(results_file):
+        os.remove(results_file)
+
+    # cocotb_test only takes the results file from the environment of pytest
+    results_env = os.environ.get('COCOTB_RESULTS_FILE')
+    os.environ['COCOTB_RESULTS_FILE'] = results_file
+
+    extra_env = dict(kwargs.pop('extra_env', None) or {})
+    extra_env.update(env)
+    try:
+        run(extra_env=extra_env, **kwargs)
+    except SystemExit as e:
+        # Failed tests are compared below, no results file means the simulator crashed
+        if not os.path.isfile(results_file):
+            raise RuntimeError(str(e)) from None
+    finally:
+        if results_env is None:
+            del os.environ['COCOTB_RESULTS_FILE']
+        else:
+            os.environ['COCOTB_RESULTS_FILE'] = results_env
+
+    mismatches = []
+    rtl_results = _results_outcomes(results_file)
+    for name, error in model_results.items():
+        if name not in rtl_results:
+            mismatches.append(f'{name}: not run by the simulator')
+        elif rtl_results[name] != (error is None):
+            mismatches.append(f'{name}: model {"passed" if error is None else "failed"}, RTL {"passed" if rtl_results[name] else "failed"}')
+
+    for capture in captures:
+        for index, error in compare_captures(os.path.join(model_dir, capture), os.path.join(sim_build, capture)):
+            mismatches.append(f'{capture} frame {index}: {error}')
+
+    for mismatch in mismatches:
+        log.error(f'Crosscheck: {mismatch}')
+    if mismatches:
+        raise SystemExit(f'FAILED crosscheck, {len(mismatches)} mismatches between the model and the RTL.')
+
+    failed = len(rtl_results) - sum(rtl_results.values())
+    if failed:
+        raise SystemExit(f'FAILED {failed} tests.')
+
+    return results_file
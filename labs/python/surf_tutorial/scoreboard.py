@@ -0,0 +1,172 @@
+##############################################################################
+## This file is part of 'surf-tutorial'.
+## It is subject to the license terms in the LICENSE.txt file found in the
+## top-level directory of this distribution and at:
+##    https://confluence.slac.stanford.edu/display/ppareg/LICENSE.html.
+## No part of 'surf-tutorial', including this file,
+## may be copied, modified, propagated, or distributed except according to
+## the terms contained in the LICENSE.txt file.
+##############################################################################
+
+#-----------------------------------------------------------------------------
+# tdata scoreboard, checked inline or in worker processes (SCOREBOARD_WORKERS=n).
+#
+# With workers, the sent and received tdata of each frame are copied into a
+# shared memory ring (anonymous mmap) and only (offset, lengths) are sent to
+# the workers, which compute the expected tdata and compare it. Mismatches
+# come back asynchronously and fail the test at sync() or close(), so the
+# checks do not hold up the simulation while Python crunches large frames.
+#
+# The workers compare the received tdata in place in the ring. The sent tdata
+# is copied out of the ring once more, into the bytes the expected-result
+# function is called with.
+#
+# The workers are forked, so they inherit the ring and the expected-result
+# function of the testbench. Do not use cocotb in the expected-result function.
+#-----------------------------------------------------------------------------
+
+import collections
+import concurrent.futures
+import mmap
+import multiprocessing
+import os
+
+def scoreboard_workers():
+    return int(os.getenv('SCOREBOARD_WORKERS', '0'))
+
+def _mismatch(expected, received):
+    if len(expected) != len(received):
+        return f'{len(received)} bytes received, {len(expected)} bytes expected'
+    if expected == received:
+        return None
+    for index, (x, y) in enumerate(zip(expected, received)):
+        if x != y:
+            return f'byte {index} is {hex(y)}, expected {hex(x)}'
+    return None
+
+# Worker process state, set by _init_worker()
+_worker = {}
+
+def _init_worker(ring, expected, args):
+    _worker['ring']     = ring
+    _worker['expected'] = expected
+    _worker['args']     = args
+
+def _check_frame(offset, sent_length, received_length):
+    view = memoryview(_worker['ring'])
+    sent     = bytes(view[offset:offset+sent_length])
+    received = view[offset+sent_length:offset+sent_length+received_length]
+    return _mismatch(_worker['expected'](sent, *_worker['args']), received)
+
+class Scoreboard:
+    """
+    Compares the received tdata of every frame with expected(sent tdata, *args).
+
+    Parameters:
+    - expected: expected-result function, e.g. CalculateExpectedResult.
+    - args: extra arguments of the expected-result function.
+    - workers: number of worker processes, 0 checks every frame inline in
+      check() (default: SCOREBOARD_WORKERS, 0 if not set).
+    - ring_size: size in bytes of the shared memory ring. check() waits for the
+      oldest checks to complete when the ring is full, frames larger than the
+      ring are checked inline.
+
+    A test that can fail before close() should register shutdown() as a
+    teardown (budget.register_teardown()), so its workers are released.
+    """
+    def __init__(self, expected, *args, workers=None, ring_size=64<<20):
+        self.expected = expected
+        self.args = args
+        self.workers = scoreboard_workers() if workers is None else workers
+        self.count = 0
+        self.mismatches = []
+
+        self._pool = None
+        if self.workers > 0:
+            self._ring_size = ring_size
+            self._ring = mmap.mmap(-1, ring_size)
+            self._head = 0
+            # (frame index, future, ring offset) of the checks in flight, oldest first
+            self._pending = collections.deque()
+            self._pool = concurrent.futures.ProcessPoolExecutor(
+                max_workers = self.workers,
+                mp_context  = multiprocessing.get_context('fork'),
+                initializer = _init_worker,
+                initargs    = (self._ring, expected, args),
+            )
+
+    def _allocate(self, length):
+        # Ring offset for 'length' bytes, None if the ring is full.
+        # The head never catches up with the oldest check in flight (tail).
+        if not self._pending:
+            self._head = 0
+            return 0 if length <= self._ring_size else None
+        tail = self._pending[0][2]
+        if self._head >= tail:
+            if self._head + length <= self._ring_size:
+                return self._head
+            if length < tail:
+                return 0
+            return None
+        if self._head + length < tail:
+            return self._head
+        return None
+
+    def _retire(self, block):
+        # Collect the completed checks, in order, so their ring space is released
+        while self._pending and (block or self._pending[0][1].done()):
+            index, future, offset = self._pending.popleft()
+            error = future.result()
+            if error is not None:
+                self.mismatches.append((index, error))
+
+    def check(self, sent, received):
+        """
+        Checks a frame: received tdata == expected(sent tdata, *args).
+        Raises AssertionError right away when checking inline.
+        """
+        index = self.count
+        self.count += 1
+
+        length = len(sent) + len(received)
+        if self._pool is None or length > self._ring_size:
+            error = _mismatch(self.expected(sent, *self.args), received)
+            if error is not None:
+                self.mismatches.append((index, error))
+                if self._pool is None:
+                    raise AssertionError(f'frame {index}: {error}')
+            return
+
+        self._retire(block=False)
+        offset = self._allocate(length)
+        while offset is None:
+            # Ring full: wait for the oldest check to release its space
+            self._pending[0][1].result()
+            self._retire(block=False)
+            offset = self._allocate(length)
+
+        self._ring[offset:offset+len(sent)] = sent
+        self._ring[offset+len(sent):offset+length] = received
+        self._head = offset + length
+        self._pending.append((index, self._pool.submit(_check_frame, offset, len(sent), len(received)), offset))
+
+    def sync(self):
+        """Waits for the checks in flight and raises AssertionError if any frame mismatched."""
+        if self._pool is not None:
+            self._retire(block=True)
+        if self.mismatches:
+            errors = '\n'.join(f'frame {index}: {error}' for index, error in self.mismatches[:10])
+            raise AssertionError(f'{len(self.mismatches)} of {self.count} frames mismatched:\n{errors}')
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+            self._pending.clear()
+
+    def close(self):
+        """sync() then shuts the workers down."""
+        try:
+            self.sync()
+        finally:
+            self.shutdown()
@@ -0,0 +1,161 @@
+##############################################################################
+## This file is part of 'surf-tutorial'.
+## It is subject to the license terms in the LICENSE.txt file found in the
+## top-level directory of this distribution and at:
+##    https://confluence.slac.stanford.edu/display/ppareg/LICENSE.html.
+## No part of 'surf-tutorial', including this file,
+## may be copied, modified, propagated, or distributed except according to
+## the terms contained in the LICENSE.txt file.
+##############################################################################
+
+#-----------------------------------------------------------------------------
+# Testbench reuse across the TestFactory permutations of a simulation.
+#
+# cocotb kills every coroutine at the end of a test (clock, driver processes,
+# reset monitors, pause generators), but the driver objects and their bus
+# handles stay valid. Instead of resolving the buses and creating the drivers
+# again for every permutation, the TB of a DUT is created by the first test of
+# the simulation and restarted by the following ones, which only reset the DUT
+# if the previous test failed or left it busy. Enabled with TB_REUSE=1.
+#
+# The restart uses the reset handling of the cocotbext-axi drivers, including
+# private attributes. They are checked before the first reuse, and TB_REUSE=1
+# is ignored (with a warning) if the installed cocotbext-axi lacks any of them.
+#-----------------------------------------------------------------------------
+
+import functools
+import logging
+import os
+
+import cocotb
+from cocotbext.axi import AxiStreamSink
+from cocotbext.axi.axil_channels import AxiLiteBSink
+from cocotbext.axi.reset import Reset
+
+from surf_tutorial.budget import previous_test_passed
+from surf_tutorial.dut import is_model
+
+# TBs of the current simulation, by (TB class, DUT name)
+_testbenches = {}
+
+# Background processes of the cocotbext-axi monitors and sinks: (method, bus signal)
+_WAKE_MONITORS = [
+    ('_run_tvalid_monitor', 'tvalid'),
+    ('_run_tready_monitor', 'tready'),
+    ('_run_valid_monitor',  'valid'),
+    ('_run_ready_monitor',  'ready'),
+]
+
+log = logging.getLogger("cocotb.tb")
+
+@functools.lru_cache(maxsize=None)
+def _missing_internals():
+    # The cocotbext-axi internals restart_drivers() relies on
+    missing = [f'Reset.{name}' for name in ['_init_reset', '_update_reset', '_handle_reset', '_run_reset'] if not hasattr(Reset, name)]
+    if hasattr(Reset, '_init_reset'):
+        names = Reset._init_reset.__code__.co_names
+        missing += [f'Reset.{name}' for name in ['_local_reset', '_ext_reset', '_reset_state'] if name not in names]
+    for driver, signals in [(AxiStreamSink, ['tvalid', 'tready']), (AxiLiteBSink, ['valid', 'ready'])]:
+        missing += [f'{driver.__name__}._run_{signal}_monitor' for signal in signals if not hasattr(driver, f'_run_{signal}_monitor')]
+    if missing:
+        log.warning( f'TB_REUSE=1 ignored, the installed cocotbext-axi lacks {", ".join(missing)}' )
+    return missing
+
+def tb_reuse():
+    return os.getenv('TB_REUSE', '0') == '1' and not _missing_internals()
+
+def _reset_components(driver):
+    # The driver and its sub-drivers (e.g. AxiLiteMaster.write_if.aw_channel) with a reset
+    components = []
+    pending = [driver]
+    while pending:
+        component = pending.pop(0)
+        if any(component is other for other in components):
+            continue
+        components.append(component)
+        pending += [value for value in vars(component).values() if isinstance(value, Reset)]
+    return [component for component in components if isinstance(component, Reset)]
+
+def _idle(driver):
+    if not driver.idle():
+        return False
+    # Frames received but not read by the previous test
+    return not hasattr(driver, 'empty') or driver.empty()
+
+def restart_drivers(drivers, reset, reset_active_level=True):
+    """
+    Restarts cocotbext-axi drivers created by a previous test: their queues and
+    pause generators are flushed and their processes restarted, as a reset of
+    the driver would (without driving the DUT reset).
+
+    Returns True if every driver was idle at the end of the previous test.
+    The operations a failed or aborted test left in flight are flushed (and
+    their events set to None), so the drivers are idle again afterwards.
+
+    Parameters:
+    - drivers: list of drivers (AxiStreamSource, AxiStreamSink, AxiLiteMaster, ...).
+    - reset, reset_active_level: the reset the drivers were created with.
+    """
+    idle = all(_idle(driver) for driver in drivers)
+
+    for driver in drivers:
+        for component in _reset_components(driver):
+            component._handle_reset(True)
+            if hasattr(component, 'clear'):
+                component.clear()
+            if hasattr(component, 'clear_pause_generator'):
+                component.clear_pause_generator()
+                component.pause = False
+
+            # The previous test may have ended with the DUT reset asserted,
+            # the new reset monitor picks the next edge up
+            component._local_reset = False
+            component._ext_reset = False
+            component._reset_state = False
+            component._handle_reset(False)
+            cocotb.start_soon(component._run_reset(reset, bool(reset_active_level)))
+
+            for method, signal in _WAKE_MONITORS:
+                bus = getattr(component, 'bus', None)
+                if hasattr(component, method) and getattr(bus, signal, None) is not None:
+                    cocotb.start_soon(getattr(component, method)())
+
+    # A driver still busy would make every following test reset the DUT
+    busy = [type(driver).__name__ for driver in drivers if not driver.idle()]
+    if busy:
+        raise RuntimeError(f'{", ".join(busy)} still busy after the restart, run without TB_REUSE=1')
+
+    return idle
+
+class SessionTB:
+    """
+    Base class of the lab TBs: with TB_REUSE=1, TB(dut) returns the TB created
+    by a previous test on the same DUT, if any, so the following tests only
+    restart it.
+
+    Sets on the TB:
+    - reused: False for the first TB(dut) of the simulation, True afterwards.
+    - needs_reset: True until the DUT is reset. Set again when the previous
+      test on the DUT failed, was aborted or ran without with_budget() (see
+      budget.previous_test_passed()), and by the TB when that test left the
+      DUT busy (see restart_drivers()).
+
+    The DUT models (SIM_MODE=model) are created for every test, so their TB is too.
+    """
+    def __new__(cls, dut):
+        key = None
+        if tb_reuse() and not is_model(dut):
+            key = (cls, dut._name)
+
+        tb = _testbenches.get(key)
+        if tb is not None:
+            tb.reused = True
+            tb.needs_reset |= not previous_test_passed(dut)
+            return tb
+
+        tb = super().__new__(cls)
+        tb.reused = False
+        tb.needs_reset = True
+        if key is not None:
+            _testbenches[key] = tb
+        return tb
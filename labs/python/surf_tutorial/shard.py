@@ -0,0 +1,36 @@
+##############################################################################
+## This file is part of 'surf-tutorial'.
+## It is subject to the license terms in the LICENSE.txt file found in the
+## top-level directory of this distribution and at:
+##    https://confluence.slac.stanford.edu/display/ppareg/LICENSE.html.
+## No part of 'surf-tutorial', including this file,
+## may be copied, modified, propagated, or distributed except according to
+## the terms contained in the LICENSE.txt file.
+##############################################################################
+
+
+#-----------------------------------------------------------------------------
+# Simulator side of the sharded regressions (see runner.run_sharded()).
+#
+# The shards run concurrently in the same sim_build directory, so the files
+# the testbench writes there get a name per shard, e.g. S_AXIS.axis becomes
+# S_AXIS_shard1.axis in the simulator process of shard 1.
+#-----------------------------------------------------------------------------
+
+import os
+
+def shard_index():
+    """Index of the shard of this simulator process, None if not sharded."""
+    index = os.getenv('SHARD')
+    return None if index is None else int(index)
+
+def shard_path(path):
+    """
+    Name of the output file 'path' for this shard. Absolute paths, set by
+    the user (e.g. METRICS_FILE), are kept as they are.
+    """
+    index = shard_index()
+    if index is None or os.path.isabs(path):
+        return path
+    root, ext = os.path.splitext(path)
+    return f'{root}_shard{index}{ext}'
@@ -0,0 +1,116 @@
+##############################################################################
+## This file is part of 'surf-tutorial'.
+## It is subject to the license terms in the LICENSE.txt file found in the
+## top-level directory of this distribution and at:
+##    https://confluence.slac.stanford.edu/display/ppareg/LICENSE.html.
+## No part of 'surf-tutorial', including this file,
+## may be copied, modified, propagated, or distributed except according to
+## the terms contained in the LICENSE.txt file.
+##############################################################################
+
+#-----------------------------------------------------------------------------
+# Regression tiers, selected with the REGRESSION_TIER environment variable:
+#
+#   quick   : seeded, coverage-weighted sample of the TestFactory permutations
+#             and of the sizes/addresses swept inside the tests
+#   nightly : everything, the labs do not sample it (a tier_sample() call
+#             can still pass a 'nightly' count)
+#   full    : everything (default)
+#
+# The sample is seeded with REGRESSION_SEED (default 0), so the pytest side
+# and the simulator side (and two runs with the same seed) pick the same tests.
+#-----------------------------------------------------------------------------
+
+import itertools
+import os
+import random
+
+TIERS = ['quick', 'nightly', 'full']
+
+def regression_tier():
+    tier = os.getenv('REGRESSION_TIER', 'full')
+    if tier not in TIERS:
+        raise ValueError(f'REGRESSION_TIER={tier} is not one of {TIERS}')
+    return tier
+
+def regression_seed():
+    return int(os.getenv('REGRESSION_SEED', '0'))
+
+def _components(case):
+    # The individual values a case covers, e.g. (length, region, offset).
+    # Single value cases have nothing to cover beyond themselves.
+    if isinstance(case, tuple):
+        return set(enumerate(case))
+    return set()
+
+def _covering_sample(cases, count, rng, keep=()):
+    selected  = [index for index, case in enumerate(cases) if case in keep]
+    remaining = [index for index, case in enumerate(cases) if case not in keep]
+    rng.shuffle(remaining)
+
+    # Greedily add the case covering the most values not covered yet,
+    # until every value of every component is covered at least once
+    uncovered = set()
+    for case in cases:
+        uncovered |= _components(case)
+    for index in selected:
+        uncovered -= _components(cases[index])
+
+    while uncovered and remaining:
+        best = max(remaining, key=lambda index: len(_components(cases[index]) & uncovered))
+        remaining.remove(best)
+        selected.append(best)
+        uncovered -= _components(cases[best])
+
+    # Fill up with random cases
+    selected += remaining[:max(0, count-len(selected))]
+
+    return [cases[index] for index in sorted(selected)]
+
+def tier_sample(cases, quick, nightly=None, keep=()):
+    """
+    Returns the cases to run for the selected regression tier, in their original order.
+
+    For 'full' every case is returned. Otherwise the 'keep' cases (e.g. boundary
+    sizes), then for tuple cases enough cases to cover every value of every
+    component at least once, then random cases, up to 'quick' or 'nightly' cases.
+
+    Parameters:
+    - cases: list of cases (values or tuples of values).
+    - quick: number of cases for the quick tier.
+    - nightly: number of cases for the nightly tier (None = every case).
+    - keep: cases always included in the sample.
+    """
+    tier  = regression_tier()
+    count = {'quick': quick, 'nightly': nightly, 'full': None}[tier]
+    if count is None or count >= len(cases):
+        return list(cases)
+
+    rng = random.Random(f'{regression_seed()}:{len(cases)}:{count}')
+    return _covering_sample(list(cases), count, rng, keep)
+
+def tier_options(options, quick=1):
+    """
+    Returns the TestFactory options for the selected regression tier.
+
+    For 'quick' the cross product is replaced by a single grouped option
+    holding a coverage-weighted sample of the permutations: every option value
+    is used at least once, plus random permutations up to 'quick' permutations.
+    The options are returned unchanged for 'nightly' and 'full'.
+
+    Parameters:
+    - options: {option name: option values} dictionary.
+    - quick: minimum number of permutations for the quick tier.
+    """
+    if regression_tier() != 'quick' or not options:
+        return options
+
+    names  = tuple(options)
+    values = list(options.values())
+
+    # Sample the permutations by index, the option values are not always hashable
+    permutations = list(itertools.product(*[range(len(v)) for v in values]))
+    rng = random.Random(f'{regression_seed()}:{",".join(names)}')
+    sample = _covering_sample(permutations, quick, rng)
+
+    return {names: [tuple(values[k][index] for k, index in enumerate(permutation)) for permutation in sample]}
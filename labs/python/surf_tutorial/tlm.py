@@ -0,0 +1,712 @@
+##############################################################################
+## This file is part of 'surf-tutorial'.
+## It is subject to the license terms in the LICENSE.txt file found in the
+## top-level directory of this distribution and at:
+##    https://confluence.slac.stanford.edu/display/ppareg/LICENSE.html.
+## No part of 'surf-tutorial', including this file,
+## may be copied, modified, propagated, or distributed except according to
+## the terms contained in the LICENSE.txt file.
+##############################################################################
+
+#-----------------------------------------------------------------------------
+# Transaction-level modeling (fast mode, SIM_MODE=model):
+#
+# The tb_*.py test coroutines run unchanged against a Python model of the DUT
+# instead of the simulator. ModelSim is a small discrete-event kernel that
+# understands the triggers the tests await (RisingEdge/FallingEdge of the
+# model clock, Timer, tasks, events and queues), so a regression runs in milliseconds
+# and without GHDL. The models are cycle-approximate: the transactions and the
+# data are exact, their timing is an estimate of the RTL's.
+#
+# The kernel stands in for internals of cocotb 1.x (cocotb.scheduler, the
+# cocotb.utils.simulator time functions, SimTimeoutError and the TestFactory
+# test naming), hence the cocotb<2 pin in pip_requirements.txt.
+#-----------------------------------------------------------------------------
+
+import abc
+import contextlib
+import heapq
+import inspect
+import itertools
+import logging
+import os
+import time
+
+import cocotb
+import cocotb.utils
+from cocotb.result   import SimTimeoutError
+from cocotb.triggers import FallingEdge, PythonTrigger, RisingEdge, Timer
+from cocotb.utils    import get_sim_steps, get_time_from_sim_steps
+
+from cocotbext.axi import AxiStreamFrame
+from cocotbext.axi.address_space import Region
+from cocotbext.axi.axil_master   import AxiLiteReadResp, AxiLiteWriteResp
+from cocotbext.axi.constants     import AxiResp
+
+from surf_tutorial.budget import run_teardowns
+
+log = logging.getLogger("cocotb.tb")
+
+# Picoseconds per cocotb time unit
+PS_PER_UNIT = {'fs': 0.001, 'ps': 1, 'ns': 1000, 'us': 1000_000, 'ms': 1000_000_000, 'sec': 1000_000_000_000}
+
+class ModelTask:
+    """Coroutine scheduled by ModelSim, same API as the cocotb Task the tests use."""
+    def __init__(self, sim, coro):
+        self.sim = sim
+        self.coro = coro
+        self._done = False
+        self._result = None
+        self._exception = None
+        self._waiters = []
+
+    def _step(self, value=None):
+        if self._done:
+            return
+        self.sim._current_task = self
+        try:
+            trigger = self.coro.send(value)
+        except StopIteration as e:
+            self._finish(result=e.value)
+        except BaseException as e:
+            self._finish(exception=e)
+        else:
+            self.sim._wait(self, trigger)
+        finally:
+            self.sim._current_task = None
+
+    def _finish(self, result=None, exception=None):
+        self._done = True
+        self._result = result
+        self._exception = exception
+        for task in self._waiters:
+            self.sim._schedule(self.sim.time, task)
+        self._waiters = []
+        if exception is not None:
+            self.sim._task_failed(self, exception)
+
+    def done(self):
+        return self._done
+
+    def result(self):
+        if self._exception is not None:
+            raise self._exception
+        return self._result
+
+    def kill(self):
+        if not self._done:
+            self.coro.close()
+            self._finish()
+
+    def join(self):
+        return self
+
+    def __await__(self):
+        if not self._done:
+            yield self
+        return self.result()
+
+class ModelEvent:
+    """Event with a data payload, same API as cocotb.triggers.Event."""
+    def __init__(self, sim):
+        self.sim = sim
+        self.data = None
+        self._set = False
+        self._waiters = []
+
+    def set(self, data=None):
+        self.data = data
+        self._set = True
+        for task in self._waiters:
+            self.sim._schedule(self.sim.time, task)
+        self._waiters = []
+
+    def clear(self):
+        self._set = False
+
+    def is_set(self):
+        return self._set
+
+    def wait(self):
+        return self
+
+    def __await__(self):
+        if not self._set:
+            yield self
+        return self
+
+class ModelValue(int):
+    """Signal value, with the BinaryValue attributes the tests use."""
+    @property
+    def integer(self):
+        return int(self)
+
+    @property
+    def is_resolvable(self):
+        return True
+
+class ModelSignal:
+    """
+    Stand-in for a simulator signal handle: holds a value and calls
+    on_change(value) whenever the testbench assigns it.
+    """
+    def __init__(self, name, value=0, width=1, on_change=None):
+        self._name = name
+        self._value = ModelValue(value)
+        self.width = width
+        self.on_change = on_change
+
+    @property
+    def value(self):
+        return self._value
+
+    @value.setter
+    def value(self, value):
+        self._value = ModelValue(value)
+        if self.on_change is not None:
+            self.on_change(self._value)
+
+    def setimmediatevalue(self, value):
+        self.value = value
+
+    def __len__(self):
+        return self.width
+
+class ModelClock(ModelSignal):
+    """Free running model clock, starting high at time 0 like cocotb.clock.Clock."""
+    def __init__(self, sim, name, period_ns):
+        super().__init__(name)
+        self.sim = sim
+        self.period = int(round(period_ns*1000))
+
+    def next_edge(self, rising=True):
+        offset = 0 if rising else self.period//2
+        return ((self.sim.time - offset)//self.period + 1)*self.period + offset
+
+    def cycle(self):
+        return self.sim.time//self.period
+
+class _ModelSimulatorTime:
+    # Stand-in for the cocotb.simulator functions behind cocotb.utils.get_sim_time()
+    def __init__(self, sim):
+        self.sim = sim
+
+    def get_precision(self):
+        return -15
+
+    def get_sim_time(self):
+        steps = get_sim_steps(self.sim.time, 'ps')
+        return steps >> 32, steps & 0xFFFFFFFF
+
+class ModelSim:
+    """
+    Discrete-event kernel running the test coroutines against a DUT model.
+    Time is kept in integer ps.
+    """
+    def __init__(self):
+        self.time = 0
+        self._queue = []
+        self._seq = itertools.count()
+        self._failure = None
+        self._current_task = None
+
+    def now(self, units='ns'):
+        return self.time/PS_PER_UNIT[units]
+
+    def start_soon(self, coro):
+        task = coro if isinstance(coro, ModelTask) else ModelTask(self, coro)
+        self._schedule(self.time, task)
+        return task
+
+    def _schedule(self, at, task, value=None):
+        heapq.heappush(self._queue, (at, next(self._seq), task, value))
+
+    def _wait(self, task, trigger):
+        if isinstance(trigger, (RisingEdge, FallingEdge)) and isinstance(trigger.signal, ModelClock):
+            self._schedule(trigger.signal.next_edge(isinstance(trigger, RisingEdge)), task, trigger)
+        elif isinstance(trigger, Timer):
+            self._schedule(self.time + round(get_time_from_sim_steps(trigger.sim_steps, 'ps')), task, trigger)
+        elif isinstance(trigger, (ModelTask, ModelEvent)):
+            trigger._waiters.append(task)
+        elif isinstance(trigger, PythonTrigger):
+            # cocotb Event, Lock and Queue triggers fire from Python code
+            trigger.prime(lambda trigger, task=task: self._schedule(self.time, task, trigger))
+        else:
+            task._finish(exception=TypeError(f'{trigger!r} is not supported by the DUT model'))
+
+    def _task_failed(self, task, exception):
+        # Like cocotb, an exception in any task fails the test
+        if self._failure is None:
+            self._failure = exception
+
+    async def cycles(self, clock, count=1):
+        """Waits for 'count' rising edges of a model clock."""
+        for _ in range(count):
+            await RisingEdge(clock)
+
+    @contextlib.contextmanager
+    def installed(self):
+        """
+        Installs the kernel in place of the cocotb scheduler and simulator time
+        functions, and restores them on exit: cocotb.start_soon() is used by the
+        tests (and cocotbext) to fork tasks, get_sim_time() to time them.
+        """
+        scheduler, cocotb.scheduler = cocotb.scheduler, self
+        simulator, cocotb.utils.simulator = cocotb.utils.simulator, _ModelSimulatorTime(self)
+        try:
+            yield self
+        finally:
+            cocotb.scheduler = scheduler
+            cocotb.utils.simulator = simulator
+
+    def run(self, coro, sim_time=None):
+        """
+        Runs a test coroutine until it completes.
+
+        Parameters:
+        - coro: test coroutine.
+        - sim_time: simulation time budget in ns (None = unlimited).
+
+        Returns:
+        - The result of the test coroutine.
+
+        Raises:
+        - The exception of the test coroutine (or of any task it started).
+        - cocotb.result.SimTimeoutError if the test deadlocks or exceeds sim_time.
+        """
+        with self.installed():
+            try:
+                test = self.start_soon(coro)
+                while not test.done() and self._failure is None:
+                    if not self._queue:
+                        raise SimTimeoutError(f'test deadlocked at {self.now()}ns, no pending trigger')
+                    at, _, task, value = heapq.heappop(self._queue)
+                    if sim_time is not None and at > sim_time*PS_PER_UNIT['ns']:
+                        raise SimTimeoutError(f'test exceeded its sim-time budget of {sim_time}ns')
+                    self.time = at
+                    task._step(value)
+                if self._failure is not None:
+                    raise self._failure
+                return test.result()
+            finally:
+                for _, _, task, _ in self._queue:
+                    task.kill()
+                self._queue = []
+
+class DutModel(abc.ABC):
+    """
+    Base class of the DUT models: exposes the clock, reset and generic handles
+    the tb_*.py testbenches use on a cocotb dut, with its own ModelSim kernel.
+
+    Parameters:
+    - name: DUT (toplevel) name.
+    - clock: name of the clock port.
+    - reset: name of the active-low reset port.
+    - period_ns: clock period of the testbench.
+    """
+    def __init__(self, name, clock, reset, period_ns):
+        self._name = name
+        self.sim = ModelSim()
+        self.log = logging.getLogger(f'cocotb.{name}')
+        self.clock = ModelClock(self.sim, clock, period_ns)
+        self.reset = ModelSignal(reset, 0, on_change=self._reset_changed)
+        setattr(self, clock, self.clock)
+        setattr(self, reset, self.reset)
+        self._in_reset = True
+
+    def _reset_changed(self, value):
+        if not value and not self._in_reset:
+            self._in_reset = True
+            self.handle_reset()
+        elif value:
+            self._in_reset = False
+
+    def handle_reset(self):
+        """Called when the reset is asserted, returns the model to its reset state."""
+
+    def cycle(self):
+        return self.clock.cycle()
+
+    def __iter__(self):
+        return iter([self.clock, self.reset])
+
+class ModelAxiLiteInterface:
+    """Write or read side of ModelAxiLiteMaster, with the channel pause generators."""
+    class Channel:
+        def __init__(self):
+            self.pause_generator = None
+
+        def set_pause_generator(self, generator=None):
+            self.pause_generator = generator
+
+        def clear_pause_generator(self):
+            self.pause_generator = None
+
+    def __init__(self, channels, byte_lanes):
+        self.byte_lanes = byte_lanes
+        self.in_flight_operations = 0
+        for channel in channels:
+            setattr(self, f'{channel}_channel', self.Channel())
+
+class ModelAxiLiteMaster(Region):
+    """
+    Drop-in for cocotbext.axi.AxiLiteMaster connected to an AXI-Lite DUT model.
+
+    Every 32-bit access takes 'latency' cycles, plus the cycles the channel
+    pause generators hold the handshakes off. Transactions are serialized
+    (the surf AXI-Lite slaves handle one transaction at a time).
+
+    Parameters:
+    - dut: DUT model with read_word(address) -> (data, resp) and
+      write_word(address, data, strb) -> resp methods.
+    - address_width: width of the AXI-Lite address bus.
+    - latency: cycles per 32-bit access.
+    """
+    def __init__(self, dut, address_width, latency=4, **kwargs):
+        super().__init__(2**address_width, **kwargs)
+        self.dut = dut
+        self.address_width = address_width
+        self.latency = latency
+        self.byte_lanes = 4
+        self.write_if = ModelAxiLiteInterface(['aw', 'w', 'b'], self.byte_lanes)
+        self.read_if  = ModelAxiLiteInterface(['ar', 'r'], self.byte_lanes)
+        self._busy = False
+        self._idle = ModelEvent(dut.sim)
+
+    async def _pause(self, *channels):
+        for channel in channels:
+            while channel.pause_generator is not None and next(channel.pause_generator):
+                await RisingEdge(self.dut.clock)
+
+    async def _acquire(self):
+        while self._busy:
+            self._idle.clear()
+            await self._idle.wait()
+        self._busy = True
+
+    def _release(self):
+        self._busy = False
+        self._idle.set()
+
+    def _words(self, address, length):
+        start = address - address % self.byte_lanes
+        return range(start, address+max(length, 1), self.byte_lanes)
+
+    def init_read(self, address, length, prot=None, event=None):
+        if event is None:
+            event = ModelEvent(self.dut.sim)
+        async def wrapper():
+            event.set(await self.read(address, length))
+        cocotb.start_soon(wrapper())
+        return event
+
+    def init_write(self, address, data, prot=None, event=None):
+        if event is None:
+            event = ModelEvent(self.dut.sim)
+        async def wrapper():
+            event.set(await self.write(address, data))
+        cocotb.start_soon(wrapper())
+        return event
+
+    async def read(self, address, length, prot=None):
+        if address < 0 or address+length > 2**self.address_width:
+            raise ValueError("Requested transfer overruns end of address space")
+
+        self.read_if.in_flight_operations += 1
+        await self._acquire()
+
+        data = bytearray()
+        resp = AxiResp.OKAY
+        for word_address in self._words(address, length):
+            await self._pause(self.read_if.ar_channel)
+            await self.dut.sim.cycles(self.dut.clock, self.latency)
+            word, word_resp = self.dut.read_word(word_address)
+            await self._pause(self.read_if.r_channel)
+            if word_resp != AxiResp.OKAY:
+                resp = word_resp
+            data += word.to_bytes(self.byte_lanes, 'little')
+
+        self._release()
+        self.read_if.in_flight_operations -= 1
+
+        offset = address % self.byte_lanes
+        return AxiLiteReadResp(address, bytes(data[offset:offset+length]), resp)
+
+    async def write(self, address, data, prot=None):
+        if isinstance(data, int):
+            raise ValueError("Expected bytes or bytearray for data")
+        if address < 0 or address+len(data) > 2**self.address_width:
+            raise ValueError("Requested transfer overruns end of address space")
+
+        self.write_if.in_flight_operations += 1
+        await self._acquire()
+
+        data = bytes(data)
+        resp = AxiResp.OKAY
+        for word_address in self._words(address, len(data)):
+            # Byte lanes of this word covered by the write
+            word = 0
+            strb = 0
+            for lane in range(self.byte_lanes):
+                index = word_address + lane - address
+                if 0 <= index < len(data):
+                    word |= data[index] << (8*lane)
+                    strb |= 1 << lane
+            await self._pause(self.write_if.aw_channel, self.write_if.w_channel)
+            await self.dut.sim.cycles(self.dut.clock, self.latency)
+            word_resp = self.dut.write_word(word_address, word, strb)
+            await self._pause(self.write_if.b_channel)
+            if word_resp != AxiResp.OKAY:
+                resp = word_resp
+
+        self._release()
+        self.write_if.in_flight_operations -= 1
+
+        return AxiLiteWriteResp(address, len(data), resp)
+
+class ModelAxiStreamBus:
+    """Sideband widths of a model stream port (len(bus.tid) in the tests)."""
+    def __init__(self, tid_width, tdest_width, tuser_width):
+        self.tid   = ModelSignal('tid', width=tid_width)
+        self.tdest = ModelSignal('tdest', width=tdest_width)
+        self.tuser = ModelSignal('tuser', width=tuser_width)
+
+class ModelAxiStreamQueue:
+    """Frame queue of a model stream port, same API as cocotbext.axi AxiStreamSource/Sink."""
+    def __init__(self, dut, bus):
+        self.dut = dut
+        self.bus = bus
+        self.queue = []
+        self.queue_occupancy_limit_frames = -1
+        self.pause_generator = None
+        self._changed = ModelEvent(dut.sim)
+
+    def set_pause_generator(self, generator=None):
+        self.pause_generator = generator
+
+    def clear_pause_generator(self):
+        self.pause_generator = None
+
+    def paused(self):
+        return self.pause_generator is not None and bool(next(self.pause_generator))
+
+    @property
+    def queue_occupancy_frames(self):
+        return len(self.queue)
+
+    def count(self):
+        return len(self.queue)
+
+    def empty(self):
+        return not self.queue
+
+    def full(self):
+        return 0 < self.queue_occupancy_limit_frames <= len(self.queue)
+
+    def clear(self):
+        self.queue.clear()
+        self._changed.set()
+
+    def put_nowait(self, frame):
+        self.queue.append(frame)
+        self._changed.set()
+
+    async def get(self):
+        while not self.queue:
+            self._changed.clear()
+            await self._changed.wait()
+        frame = self.queue.pop(0)
+        self._changed.set()
+        return frame
+
+    async def send(self, frame):
+        while self.full():
+            self._changed.clear()
+            await self._changed.wait()
+        self.put_nowait(frame if isinstance(frame, AxiStreamFrame) else AxiStreamFrame(frame))
+
+    def send_nowait(self, frame):
+        self.put_nowait(frame if isinstance(frame, AxiStreamFrame) else AxiStreamFrame(frame))
+
+    async def recv(self, compact=True):
+        return await self.get()
+
+    def recv_nowait(self, compact=True):
+        return self.queue.pop(0)
+
+class AxiStreamDutModel(DutModel):
+    """
+    Base class of the AXI stream DUT models (S_AXIS in, M_AXIS out).
+
+    A beat moves on every clock cycle where neither the source idle
+    generator nor the sink backpressure generator pauses it, and a frame
+    is delivered to the sink 'latency' cycles after its last beat.
+    Subclasses implement transfer(frame) -> output frame.
+
+    Like cocotbext-axi, the frames carry tid/tdest/tuser per tdata byte: the
+    source drives the value of the last byte of each beat, and the sink
+    records it on every byte of the beat, compacted to a single value when
+    it is the same on every byte.
+
+    Parameters:
+    - name, period_ns: see DutModel.
+    - latency: pipeline latency in cycles.
+    - TDATA_NUM_BYTES, TID_WIDTH, TDEST_WIDTH, TUSER_WIDTH: wrapper generics.
+    """
+    def __init__(self, name, period_ns, latency=1, TDATA_NUM_BYTES=4, TID_WIDTH=1, TDEST_WIDTH=1, TUSER_WIDTH=2):
+        super().__init__(name, 'AXIS_ACLK', 'AXIS_ARESETN', period_ns)
+        self.latency = latency
+        self.TDATA_NUM_BYTES = ModelSignal('TDATA_NUM_BYTES', TDATA_NUM_BYTES, width=32)
+        self.byte_lanes = TDATA_NUM_BYTES
+        self.source = ModelAxiStreamQueue(self, ModelAxiStreamBus(TID_WIDTH, TDEST_WIDTH, TUSER_WIDTH))
+        self.sink   = ModelAxiStreamQueue(self, ModelAxiStreamBus(TID_WIDTH, TDEST_WIDTH, TUSER_WIDTH))
+        self.taps   = {'S_AXIS': [], 'M_AXIS': []}
+        self._process = None
+
+    def capture(self, prefix, path):
+        """Appends the frames crossing the S_AXIS or M_AXIS port to a capture file."""
+        from surf_tutorial.capture import AxiStreamCaptureWriter
+        writer = AxiStreamCaptureWriter(path)
+        self.taps[prefix].append(writer)
+        return writer
+
+    def handle_reset(self):
+        if self._process is not None:
+            self._process.kill()
+            self._process = None
+        self.source.clear()
+        self.sink.clear()
+
+    def _reset_changed(self, value):
+        super()._reset_changed(value)
+        if value and self._process is None:
+            self._process = self.sim.start_soon(self._run())
+
+    def _sideband(self, value, bus_signal, length):
+        mask = 2**len(bus_signal)-1
+        if not isinstance(value, (list, tuple)):
+            return int(value or 0) & mask
+        if not value:
+            return 0
+
+        # Per-byte values, padded with the last one (AxiStreamFrame.normalize())
+        values = list(value[:length]) + [value[-1]]*(length-len(value))
+        beats = []
+        for offset in range(0, length, self.byte_lanes):
+            beat = values[offset:offset+self.byte_lanes]
+            beats += [int(beat[-1]) & mask]*len(beat)
+        if not beats or all(v == beats[0] for v in beats):
+            return beats[0] if beats else 0
+        return beats
+
+    async def _run(self):
+        while True:
+            tx_frame = await self.source.get()
+            length = len(tx_frame.tdata)
+            frame = AxiStreamFrame(
+                tx_frame.tdata,
+                tid   = self._sideband(tx_frame.tid, self.source.bus.tid, length),
+                tdest = self._sideband(tx_frame.tdest, self.source.bus.tdest, length),
+                tuser = self._sideband(tx_frame.tuser, self.source.bus.tuser, length),
+            )
+
+            beats = max(1, -(-len(frame.tdata)//self.byte_lanes))
+            while beats:
+                await RisingEdge(self.clock)
+                # Both generators advance every cycle, like the cocotbext drivers
+                idle = self.source.paused()
+                backpressure = self.sink.paused()
+                if not idle and not backpressure:
+                    beats -= 1
+
+            for writer in self.taps['S_AXIS']:
+                writer.write(frame)
+
+            rx_frame = self.transfer(frame)
+            await self.sim.cycles(self.clock, self.latency)
+
+            for writer in self.taps['M_AXIS']:
+                writer.write(rx_frame)
+            self.sink.put_nowait(rx_frame)
+
+    @abc.abstractmethod
+    def transfer(self, frame):
+        """Returns the frame the DUT outputs for an input frame."""
+
+def factory_permutations(options):
+    """
+    Returns the keyword arguments of every permutation a TestFactory generates
+    from the options, in the same order (see cocotb.regression.TestFactory).
+    """
+    permutations = []
+    for values in itertools.product(*options.values()):
+        kwargs = {}
+        for name, value in zip(options, values):
+            if isinstance(name, str):
+                kwargs[name] = value
+            else:
+                kwargs.update(zip(name, value))
+        permutations.append(kwargs)
+    return permutations
+
+def run_model(factories, model, work_dir=None, testcases=None, env=None):
+    """
+    Runs the TestFactory tests of a tb_*.py module against a DUT model.
+
+    The with_budget() wrappers are removed, their sim-time budget is
+    enforced by the kernel instead, and the teardowns registered by each
+    test (budget.register_teardown()) run after it.
+
+    Parameters:
+    - factories: the 'factories' list of the tb_*.py module.
+    - model: DUT model class (or factory), called once per test.
+    - work_dir: directory the tests run in (capture files, ...).
+    - testcases: names of the tests to run (None = every test).
+    - env: extra environment variables set while the tests run.
+
+    Returns:
+    - A {test name: exception or None} dictionary, in test order.
+    """
+    results = {}
+    cwd = os.getcwd()
+    saved_env = {name: os.environ.get(name) for name in (env or {})}
+    if work_dir is not None:
+        os.makedirs(work_dir, exist_ok=True)
+        os.chdir(work_dir)
+    os.environ.update(env or {})
+
+    try:
+        for test_function, options in factories:
+            budget = getattr(test_function, 'budget', {})
+            sim_time = None
+            if budget.get('sim_time') is not None:
+                sim_time = budget['sim_time']*PS_PER_UNIT[budget['sim_time_unit']]/PS_PER_UNIT['ns']
+            test_coroutine = inspect.unwrap(test_function)
+
+            for index, kwargs in enumerate(factory_permutations(options)):
+                name = f'{test_function.__name__}_{index+1:03d}'
+                if testcases is not None and name not in testcases:
+                    continue
+
+                dut = model()
+                start = time.monotonic()
+                try:
+                    dut.sim.run(test_coroutine(dut, **kwargs), sim_time=sim_time)
+                    results[name] = None
+                except Exception as e:
+                    results[name] = e
+                finally:
+                    run_teardowns()
+                wall = time.monotonic() - start
+
+                status = 'PASS' if results[name] is None else f'FAIL ({results[name]!r})'
+                log.info( f'{name} {status} sim_time={dut.sim.now()}ns wall_time={wall:.3f}s' )
+    finally:
+        os.chdir(cwd)
+        for name, value in saved_env.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+    return results
@@ -0,0 +1,116 @@
+##############################################################################
+## This file is part of 'surf-tutorial'.
+## It is subject to the license terms in the LICENSE.txt file found in the
+## top-level directory of this distribution and at:
+##    https://confluence.slac.stanford.edu/display/ppareg/LICENSE.html.
+## No part of 'surf-tutorial', including this file,
+## may be copied, modified, propagated, or distributed except according to
+## the terms contained in the LICENSE.txt file.
+##############################################################################
+
+# Unit tests of surf_tutorial.capture, no simulator needed
+import os
+import struct
+import sys
+
+import pytest
+from cocotbext.axi import AxiStreamFrame
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from surf_tutorial.capture import (
+    CAPTURE_MAGIC_V1,
+    AxiStreamCaptureReader,
+    AxiStreamCaptureWriter,
+    compare_captures,
+)
+
+def write_capture(path, frames):
+    with AxiStreamCaptureWriter(path) as writer:
+        for frame in frames:
+            writer.write(frame)
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path / 'round_trip.axis')
+    frames = [
+        AxiStreamFrame(b'\x01\x02\x03\x04\x05', tid=1, tdest=2, tuser=[1, 0, 0, 0, 3]),
+        AxiStreamFrame(b'\x06', tid=0, tdest=1, tuser=2),
+        AxiStreamFrame(b'\x07\x08', tid=3, tdest=0, tuser=[1, 1]),
+        AxiStreamFrame(b'', tid=0, tdest=0),
+    ]
+    write_capture(path, frames)
+
+    with AxiStreamCaptureReader(path) as reader:
+        assert reader.version == 2
+        frames = list(reader)
+
+    assert [bytes(f.tdata) for f in frames] == [b'\x01\x02\x03\x04\x05', b'\x06', b'\x07\x08', b'']
+    assert [f.tid for f in frames] == [1, 0, 3, 0]
+    assert [f.tdest for f in frames] == [2, 1, 0, 0]
+    # Per-byte tuser, a single value when it is the same on every byte
+    assert [f.tuser for f in frames] == [[1, 0, 0, 0, 3], 2, 1, 0]
+
+def test_append(tmp_path):
+    path = str(tmp_path / 'append.axis')
+    write_capture(path, [AxiStreamFrame(b'\x01', tid=1)])
+    write_capture(path, [AxiStreamFrame(b'\x02', tid=2)])
+
+    with AxiStreamCaptureReader(path) as reader:
+        assert [(bytes(f.tdata), f.tid) for f in reader] == [(b'\x01', 1), (b'\x02', 2)]
+
+def test_truncated_record(tmp_path):
+    path = str(tmp_path / 'truncated.axis')
+    write_capture(path, [AxiStreamFrame(b'\x01\x02'), AxiStreamFrame(b'\x03\x04\x05\x06')])
+    with open(path, 'r+b') as f:
+        f.truncate(os.path.getsize(path) - 1)
+
+    with AxiStreamCaptureReader(path) as reader:
+        assert [bytes(f.tdata) for f in reader] == [b'\x01\x02']
+
+def test_read_v1(tmp_path):
+    path = str(tmp_path / 'v1.axis')
+    with open(path, 'wb') as f:
+        f.write(CAPTURE_MAGIC_V1)
+        for tdata, tid, tdest, tuser in [(b'\xaa\xbb', 1, 2, 3), (b'\xcc', 0, 1, 0)]:
+            f.write(struct.pack('<IIII', len(tdata), tid, tdest, tuser))
+            f.write(tdata)
+
+    with AxiStreamCaptureReader(path) as reader:
+        assert reader.version == 1
+        frames = list(reader)
+
+    assert [(bytes(f.tdata), f.tid, f.tdest, f.tuser) for f in frames] == [(b'\xaa\xbb', 1, 2, 3), (b'\xcc', 0, 1, 0)]
+
+    # V1 files are read only, the new records would not be readable
+    with pytest.raises(ValueError):
+        AxiStreamCaptureWriter(path)
+
+def test_not_a_capture(tmp_path):
+    path = str(tmp_path / 'other.axis')
+    with open(path, 'wb') as f:
+        f.write(b'NOTACAPTURE')
+
+    with pytest.raises(ValueError):
+        AxiStreamCaptureReader(path)
+
+def test_compare_captures(tmp_path):
+    golden = str(tmp_path / 'golden.axis')
+    frames = [
+        AxiStreamFrame(b'\x01\x02', tid=1, tdest=1, tuser=[0, 1]),
+        AxiStreamFrame(b'\x03', tid=0, tdest=0),
+    ]
+    write_capture(golden, frames)
+
+    same = str(tmp_path / 'same.axis')
+    write_capture(same, frames)
+    assert compare_captures(same, golden) == []
+
+    differs = str(tmp_path / 'differs.axis')
+    write_capture(differs, [
+        AxiStreamFrame(b'\x01\x02', tid=1, tdest=1, tuser=[1, 1]),
+        AxiStreamFrame(b'\x04', tid=1, tdest=0),
+    ])
+    assert compare_captures(differs, golden) == [(0, 'tuser differs'), (1, 'tdata differs'), (1, 'tid differs')]
+
+    shorter = str(tmp_path / 'shorter.axis')
+    write_capture(shorter, frames[:1])
+    assert compare_captures(shorter, golden) == [(1, 'frame count differs')]
@@ -0,0 +1,185 @@
+##############################################################################
+## This file is part of 'surf-tutorial'.
+## It is subject to the license terms in the LICENSE.txt file found in the
+## top-level directory of this distribution and at:
+##    https://confluence.slac.stanford.edu/display/ppareg/LICENSE.html.
+## No part of 'surf-tutorial', including this file,
+## may be copied, modified, propagated, or distributed except according to
+## the terms contained in the LICENSE.txt file.
+##############################################################################
+
+# Unit tests of the surf_tutorial.models DUT models, no simulator needed
+import os
+import sys
+
+import pytest
+from cocotbext.axi import AxiStreamFrame
+from cocotbext.axi.constants import AxiResp
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from surf_tutorial.models import (
+    AxiLiteDutModel,
+    MyAxiLiteCrossbarModel,
+    MyAxiLiteEndpointModel,
+    MyAxiStreamModuleModel,
+    MyAxiStreamMuxDemuxModel,
+)
+from surf_tutorial.tlm import AxiStreamDutModel
+
+def run(dut, test):
+    async def wrapper():
+        dut.reset.value = 1
+        return await test()
+    return dut.sim.run(wrapper())
+
+def test_abstract_models():
+    with pytest.raises(TypeError):
+        AxiLiteDutModel('dut', 10.0, 12, 4)
+    with pytest.raises(TypeError):
+        AxiStreamDutModel('dut', 10.0)
+
+def test_endpoint_registers():
+    dut = MyAxiLiteEndpointModel(PRJ_VERSION=0x01020304, GIT_HASH=0x1234, BUILD_STRING='build')
+    master = dut.axil_master
+
+    async def test():
+        assert (await master.read_dword(0x000)) == 0x01020304
+        assert (await master.read_dword(0x004)) == 0xDEADBEEF
+        await master.write_dword(0x004, 0x11223344)
+        await master.write(0x005, b'\xAA')
+        assert (await master.read_dword(0x004)) == 0x1122AA44
+        assert (await master.read(0x100, 20)).data == (0x1234).to_bytes(20, 'little')
+        assert (await master.read(0x200, 6)).data == b'build\x00'
+
+        # Read-only registers ignore the write
+        await master.write_dword(0x000, 0)
+        assert (await master.read_dword(0x000)) == 0x01020304
+
+        # Unmapped addresses answer OKAY unless EN_ERROR_RESP is set
+        assert (await master.read(0x400, 4)).resp == AxiResp.OKAY
+
+    run(dut, test)
+
+def test_endpoint_counter():
+    dut = MyAxiLiteEndpointModel()
+    master = dut.axil_master
+
+    async def test():
+        assert (await master.read_dword(0x008)) == 0
+        await master.write_dword(0x00C, 0x1)
+        assert (await master.read_dword(0x010)) == 0x100
+        await dut.sim.cycles(dut.clock, 100)
+        running = await master.read_dword(0x008)
+        assert running > 100
+        await master.write_dword(0x00C, 0x2)
+        stopped = await master.read_dword(0x008)
+        assert stopped > running
+        assert (await master.read_dword(0x010)) == 0
+        await dut.sim.cycles(dut.clock, 100)
+        assert (await master.read_dword(0x008)) == stopped
+
+    run(dut, test)
+
+def test_endpoint_error_resp():
+    dut = MyAxiLiteEndpointModel(EN_ERROR_RESP=True)
+    master = dut.axil_master
+
+    async def test():
+        assert (await master.read(0x400, 4)).resp == AxiResp.DECERR
+        assert (await master.write(0x400, b'\x00'*4)).resp == AxiResp.DECERR
+        assert (await master.read(0x004, 4)).resp == AxiResp.OKAY
+
+    run(dut, test)
+
+@pytest.mark.parametrize(
+    "address, ram, index", [
+        (0x0000_0000, 0, 0),
+        (0x0000_0FFC, 0, 0x3FF),
+        (0x0000_1000, 0, 0),         # 4kB RAM aliased over the 1MB region
+        (0x000F_FFFC, 0, 0x3FF),
+        (0x0010_0000, None, None),   # cascade crossbar, unmapped
+        (0x0010_1FFC, None, None),
+        (0x0010_2000, 1, 0),
+        (0x0010_2FFC, 1, 0x3FF),
+        (0x0010_3000, None, None),
+        (0x0016_0000, 2, 0),
+        (0x0016_1000, 2, 0),
+        (0x0017_FFFC, 2, 0x3FF),
+        (0x0018_0000, None, None),
+        (0x0020_0000, None, None),
+    ])
+def test_crossbar_regions(address, ram, index):
+    dut = MyAxiLiteCrossbarModel()
+    decoded, decoded_index = dut._decode(address)
+    if ram is None:
+        assert decoded is None
+    else:
+        assert decoded is dut.rams[ram]
+        assert decoded_index == index
+
+def test_crossbar_access():
+    dut = MyAxiLiteCrossbarModel(EN_ERROR_RESP=True)
+    master = dut.axil_master
+
+    async def test():
+        for base in [0x0000_0000, 0x0010_2000, 0x0016_0000]:
+            await master.write(base+1, bytes([base >> 16, 1, 2]))
+        assert (await master.read(0x0000_0000, 4)).data == b'\x00\x00\x01\x02'
+        assert (await master.read(0x0010_2000, 4)).data == b'\x00\x10\x01\x02'
+        assert (await master.read(0x0016_1000, 4)).data == b'\x00\x16\x01\x02'
+        assert (await master.read(0x0010_0000, 4)).resp == AxiResp.DECERR
+
+    run(dut, test)
+
+def test_stream_module_transfer():
+    dut = MyAxiStreamModuleModel(TDATA_NUM_BYTES=4)
+    frame = AxiStreamFrame(b'\xFF\x00\x00\x00\xFF\xFF\xFF\xFF\x01', tid=1, tdest=0, tuser=[1, 2])
+    rx_frame = dut.transfer(frame)
+    # +1 on every 32-bit beat, the last beat is partial
+    assert bytes(rx_frame.tdata) == b'\x00\x01\x00\x00\x00\x00\x00\x00\x02'
+    assert (rx_frame.tid, rx_frame.tdest, rx_frame.tuser) == (1, 0, [1, 2])
+
+def test_mux_demux_transfer():
+    dut = MyAxiStreamMuxDemuxModel()
+    frame = AxiStreamFrame(b'\x01\x02\x03', tid=1, tdest=1, tuser=3)
+    rx_frame = dut.transfer(frame)
+    assert bytes(rx_frame.tdata) == b'\x01\x02\x03'
+    assert (rx_frame.tid, rx_frame.tdest, rx_frame.tuser) == (1, 1, 3)
+
+@pytest.mark.parametrize("model", [MyAxiStreamModuleModel, MyAxiStreamMuxDemuxModel])
+def test_stream_sideband(model):
+    dut = model(TDATA_NUM_BYTES=4, TID_WIDTH=1, TDEST_WIDTH=1, TUSER_WIDTH=2)
+
+    async def test():
+        # Per-byte sideband values, the beat carries the value of its last byte
+        await dut.source.send(AxiStreamFrame(b'\x00'*6, tid=3, tdest=[1]*6, tuser=[1, 1, 1, 2, 7, 0]))
+        await dut.source.send(AxiStreamFrame(b'\x00'*5, tid=0, tdest=0, tuser=[3]))
+        return [await dut.sink.recv(), await dut.sink.recv()]
+
+    frames = run(dut, test)
+    assert (frames[0].tid, frames[0].tdest, frames[0].tuser) == (1, 1, [2, 2, 2, 2, 0, 0])
+    assert (frames[1].tid, frames[1].tdest, frames[1].tuser) == (0, 0, 3)
+
+@pytest.mark.parametrize("model, cycles", [(MyAxiStreamModuleModel, 1), (MyAxiStreamMuxDemuxModel, 3)])
+def test_stream_timing(model, cycles):
+    dut = model(TDATA_NUM_BYTES=4)
+
+    async def test():
+        # 3 beats, then the pipeline latency
+        await dut.source.send(AxiStreamFrame(b'\x00'*12))
+        await dut.sink.recv()
+        return dut.cycle()
+
+    assert run(dut, test) == 3 + cycles
+
+def test_stream_backpressure():
+    dut = MyAxiStreamMuxDemuxModel(TDATA_NUM_BYTES=4)
+    dut.sink.set_pause_generator(iter([1, 0]*10))
+
+    async def test():
+        await dut.source.send(AxiStreamFrame(b'\x00'*12))
+        await dut.sink.recv()
+        return dut.cycle()
+
+    # Every other cycle is paused
+    assert run(dut, test) == 6 + 3
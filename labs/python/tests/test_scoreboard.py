@@ -0,0 +1,121 @@
+##############################################################################
+## This file is part of 'surf-tutorial'.
+## It is subject to the license terms in the LICENSE.txt file found in the
+## top-level directory of this distribution and at:
+##    https://confluence.slac.stanford.edu/display/ppareg/LICENSE.html.
+## No part of 'surf-tutorial', including this file,
+## may be copied, modified, propagated, or distributed except according to
+## the terms contained in the LICENSE.txt file.
+##############################################################################
+
+# Unit tests of surf_tutorial.scoreboard, no simulator needed
+import collections
+import concurrent.futures
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from surf_tutorial.scoreboard import Scoreboard
+
+def increment(sent):
+    return bytes((x + 1) % 256 for x in sent)
+
+def slow_increment(sent):
+    time.sleep(0.01)
+    return increment(sent)
+
+def future(result=None, done=True):
+    f = concurrent.futures.Future()
+    if done:
+        f.set_result(result)
+    return f
+
+def ring(ring_size, head, pending):
+    # Scoreboard with a ring of 'ring_size' bytes and the checks in flight at
+    # the 'pending' offsets, without worker processes
+    scoreboard = Scoreboard(increment, workers=0)
+    scoreboard._ring_size = ring_size
+    scoreboard._head = head
+    scoreboard._pending = collections.deque((index, future(), offset) for index, offset in enumerate(pending))
+    return scoreboard
+
+def test_allocate():
+    # Empty ring: restart at 0, unless the frame does not fit at all
+    assert ring(100, 60, [])._allocate(100) == 0
+    assert ring(100, 60, [])._allocate(101) is None
+
+    # Head after the tail: append, else wrap around to 0 before the tail
+    assert ring(100, 60, [20])._allocate(40) == 60
+    assert ring(100, 90, [20])._allocate(10) == 90
+    assert ring(100, 90, [20])._allocate(19) == 0
+    assert ring(100, 90, [20])._allocate(20) is None
+
+    # Head wrapped before the tail: never catch up with it
+    assert ring(100, 10, [50, 90])._allocate(39) == 10
+    assert ring(100, 10, [50, 90])._allocate(40) is None
+
+def test_retire():
+    scoreboard = ring(100, 30, [0, 10, 20])
+    scoreboard._pending[1] = (1, future('byte 0 differs'), 10)
+    scoreboard._pending[2] = (2, future(done=False), 20)
+
+    # Only the completed checks, in order, release their space
+    scoreboard._retire(block=False)
+    assert [offset for _, _, offset in scoreboard._pending] == [20]
+    assert scoreboard.mismatches == [(1, 'byte 0 differs')]
+    assert scoreboard._allocate(80) is None
+    assert scoreboard._allocate(70) == 30
+
+def test_inline():
+    scoreboard = Scoreboard(increment, workers=0)
+    scoreboard.check(b'\x00\x01', b'\x01\x02')
+    with pytest.raises(AssertionError, match='frame 1: byte 1 is 0x0, expected 0x3'):
+        scoreboard.check(b'\x01\x02', b'\x02\x00')
+    with pytest.raises(AssertionError, match='frame 2: 1 bytes received, 2 bytes expected'):
+        scoreboard.check(b'\x01\x02', b'\x02')
+
+def test_ring_full():
+    # 10 frames of 2x16 bytes through a 64 byte ring: check() waits for the
+    # oldest checks to release their space and wraps around
+    scoreboard = Scoreboard(slow_increment, workers=1, ring_size=64)
+    try:
+        for k in range(10):
+            sent = bytes(range(k, k+16))
+            scoreboard.check(sent, increment(sent))
+            assert len(scoreboard._pending) <= 2
+        scoreboard.close()
+    finally:
+        scoreboard.shutdown()
+    assert scoreboard.count == 10
+    assert scoreboard.mismatches == []
+
+def test_frame_larger_than_ring():
+    # Checked inline, but reported at close() like the other frames
+    scoreboard = Scoreboard(increment, workers=1, ring_size=16)
+    try:
+        scoreboard.check(b'\x00'*16, b'\x01'*16)
+        scoreboard.check(b'\x00'*16, b'\x01'*15 + b'\x00')
+        assert not scoreboard._pending
+        with pytest.raises(AssertionError, match='1 of 2 frames mismatched:\nframe 1: byte 15 is 0x0, expected 0x1'):
+            scoreboard.close()
+    finally:
+        scoreboard.shutdown()
+
+def test_corrupted_frame():
+    scoreboard = Scoreboard(increment, workers=2, ring_size=1024)
+    try:
+        for k in range(8):
+            sent = bytes(range(k, k+32))
+            received = bytearray(increment(sent))
+            if k == 5:
+                received[7] ^= 0xFF
+            # Never raises, the workers compare the frames asynchronously
+            scoreboard.check(sent, bytes(received))
+        with pytest.raises(AssertionError, match='1 of 8 frames mismatched:\nframe 5: byte 7 is 0xf2, expected 0xd'):
+            scoreboard.close()
+    finally:
+        scoreboard.shutdown()
+    assert scoreboard._pool is None
@@ -0,0 +1,50 @@
+##############################################################################
+## This file is part of 'surf-tutorial'.
+## It is subject to the license terms in the LICENSE.txt file found in the
+## top-level directory of this distribution and at:
+##    https://confluence.slac.stanford.edu/display/ppareg/LICENSE.html.
+## No part of 'surf-tutorial', including this file,
+## may be copied, modified, propagated, or distributed except according to
+## the terms contained in the LICENSE.txt file.
+##############################################################################
+
+# Unit tests of the testbench reuse bookkeeping, no simulator needed
+import os
+import sys
+
+import pytest
+from cocotbext.axi.reset import Reset
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from surf_tutorial import budget, session
+
+class Dut:
+    _name = 'dut'
+
+@pytest.fixture
+def internals():
+    session._missing_internals.cache_clear()
+    yield
+    session._missing_internals.cache_clear()
+
+def test_previous_test_passed():
+    dut = Dut()
+    assert not budget.previous_test_passed(dut)
+
+    # Consumed by the TB of the next test, the test after it has no outcome
+    budget._passed[dut._name] = True
+    assert budget.previous_test_passed(dut)
+    assert not budget.previous_test_passed(dut)
+
+def test_tb_reuse(monkeypatch, internals):
+    monkeypatch.delenv('TB_REUSE', raising=False)
+    assert not session.tb_reuse()
+    monkeypatch.setenv('TB_REUSE', '1')
+    assert session._missing_internals() == []
+    assert session.tb_reuse()
+
+def test_tb_reuse_missing_internals(monkeypatch, internals, caplog):
+    monkeypatch.setenv('TB_REUSE', '1')
+    monkeypatch.delattr(Reset, '_run_reset')
+    assert not session.tb_reuse()
+    assert 'Reset._run_reset' in caplog.text
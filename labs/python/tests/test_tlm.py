@@ -0,0 +1,151 @@
+##############################################################################
+## This file is part of 'surf-tutorial'.
+## It is subject to the license terms in the LICENSE.txt file found in the
+## top-level directory of this distribution and at:
+##    https://confluence.slac.stanford.edu/display/ppareg/LICENSE.html.
+## No part of 'surf-tutorial', including this file,
+## may be copied, modified, propagated, or distributed except according to
+## the terms contained in the LICENSE.txt file.
+##############################################################################
+
+# Unit tests of the surf_tutorial.tlm kernel, no simulator needed
+import os
+import sys
+
+import cocotb
+import cocotb.utils
+import pytest
+from cocotb.result import SimTimeoutError
+from cocotb.triggers import Event, FallingEdge, RisingEdge, Timer
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from surf_tutorial.tlm import ModelClock, ModelEvent, ModelSim, factory_permutations
+
+def test_timer_and_clock_edges():
+    sim = ModelSim()
+    clock = ModelClock(sim, 'clk', 10.0)
+    times = []
+
+    async def test():
+        await Timer(3, 'ns')
+        times.append(sim.now())
+        await RisingEdge(clock)
+        times.append(sim.now())
+        await FallingEdge(clock)
+        times.append(sim.now())
+        await RisingEdge(clock)
+        times.append(sim.now())
+        await Timer(500, 'ps')
+        times.append(cocotb.utils.get_sim_time('ns'))
+        return clock.cycle()
+
+    assert sim.run(test()) == 2
+    assert times == [3, 10, 15, 20, 20.5]
+
+def test_tasks_and_events():
+    sim = ModelSim()
+    event = ModelEvent(sim)
+    cocotb_event = Event()
+    order = []
+
+    async def child(delay):
+        await Timer(delay, 'ns')
+        order.append(f'child {delay}')
+        return delay
+
+    async def waiter():
+        await event.wait()
+        order.append(f'event {event.data}')
+        cocotb_event.set()
+
+    async def test():
+        # cocotb.start_soon() is routed to the kernel while it runs
+        tasks = [cocotb.start_soon(child(delay)) for delay in [20, 10]]
+        cocotb.start_soon(waiter())
+        results = [await task for task in tasks]
+        event.set('data')
+        await cocotb_event.wait()
+        return results
+
+    assert sim.run(test()) == [20, 10]
+    assert order == ['child 10', 'child 20', 'event data']
+    assert sim.now() == 20
+
+def test_forked_task_failure():
+    sim = ModelSim()
+
+    async def child():
+        await Timer(5, 'ns')
+        raise AssertionError('child failed')
+
+    async def test():
+        cocotb.start_soon(child())
+        await Timer(100, 'ns')
+
+    with pytest.raises(AssertionError, match='child failed'):
+        sim.run(test())
+    assert sim.now() == 5
+
+def test_deadlock():
+    sim = ModelSim()
+
+    async def test():
+        await ModelEvent(sim).wait()
+
+    with pytest.raises(SimTimeoutError, match='deadlocked'):
+        sim.run(test())
+
+def test_sim_time_budget():
+    sim = ModelSim()
+    clock = ModelClock(sim, 'clk', 10.0)
+
+    async def test():
+        while True:
+            await RisingEdge(clock)
+
+    with pytest.raises(SimTimeoutError, match='sim-time budget'):
+        sim.run(test(), sim_time=100)
+    assert sim.now() == 100
+
+def test_unsupported_trigger():
+    sim = ModelSim()
+
+    async def test():
+        await RisingEdge(object())
+
+    with pytest.raises(TypeError):
+        sim.run(test())
+
+def test_installed_restores_cocotb():
+    sim = ModelSim()
+    scheduler = cocotb.scheduler
+    simulator = cocotb.utils.simulator
+
+    with pytest.raises(RuntimeError):
+        with sim.installed():
+            assert cocotb.scheduler is sim
+            assert cocotb.utils.simulator is not simulator
+            raise RuntimeError()
+
+    assert cocotb.scheduler is scheduler
+    assert cocotb.utils.simulator is simulator
+
+    async def test():
+        raise ValueError()
+
+    with pytest.raises(ValueError):
+        sim.run(test())
+    assert cocotb.scheduler is scheduler
+    assert cocotb.utils.simulator is simulator
+
+def test_factory_permutations():
+    options = {
+        'a': [1, 2],
+        ('b', 'c'): [(3, 4), (5, 6)],
+    }
+    assert factory_permutations(options) == [
+        {'a': 1, 'b': 3, 'c': 4},
+        {'a': 1, 'b': 5, 'c': 6},
+        {'a': 2, 'b': 3, 'c': 4},
+        {'a': 2, 'b': 5, 'c': 6},
+    ]